@@ -1,5 +1,6 @@
 """
 This script must run with symmetric tables, meaning nrows = ncols.
+Tables may be toolchain CSVs or the per-test .npz matrices written beside them.
 """
 import sys
 import argparse
@@ -8,6 +9,7 @@ from pathlib import Path
 from fractions import Fraction
 from typing import List
 from dragon_runner.scripts.base import Script
+from dragon_runner.src.matrix import ResultMatrix
 
 
 class GradeScript(Script):
@@ -33,15 +35,23 @@ class GradeScript(Script):
             description="Grade 415 tournament results"
         )
         parser.add_argument("tournament_csvs", type=Path, nargs="+",
-                          help="Path(s) to tournament CSV files")
+                          help="Path(s) to tournament CSV or .npz files")
         parser.add_argument("output_csv", type=Path,
                           help="Path to output CSV file")
         parser.add_argument("--solution-name", type=str, default="solution",
                           help="Name of the solution/TA executable in the CSV (default: 'solution')")
+        parser.add_argument("--defensive-pts", type=float, default=cls.DEFENSIVE_PTS,
+                          help=f"Points per defended attacking package (default: {cls.DEFENSIVE_PTS})")
+        parser.add_argument("--offensive-pts", type=float, default=cls.OFFENSIVE_PTS,
+                          help=f"Points per successful attack (default: {cls.OFFENSIVE_PTS})")
+        parser.add_argument("--test-strength", type=Path, default=None,
+                          help="Write how many other defenders failed each test (.npz inputs only)")
         return parser
 
     @staticmethod
     def parse_fraction(s):
+        if isinstance(s, str) and s:
+            s = s.split()[0] # sampled cells are "rate [low, high]"
         try:
             return round(float(Fraction(s)), 4)
         except (ValueError, ZeroDivisionError):
@@ -52,6 +62,25 @@ class GradeScript(Script):
         with open(filepath, 'r') as f:
             return list(csv.reader(f))
 
+    @classmethod
+    def load_table(cls, filepath):
+        if Path(filepath).suffix == ".npz":
+            return ResultMatrix.load(filepath).to_table()
+        return cls.load_csv(filepath)
+
+    @staticmethod
+    def write_test_strength(matrix_paths, output_path):
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["toolchain", "attacker", "test", "defenders_failed", "defenders_run", "strength"])
+            for path in matrix_paths:
+                matrix = ResultMatrix.load(path)
+                failed, ran = matrix.test_strength()
+                for t, test in enumerate(matrix.tests):
+                    strength = round(failed[t] / ran[t], 4) if ran[t] else 0.0
+                    writer.writerow([matrix.toolchain, matrix.attackers[matrix.test_attacker[t]],
+                                     test, failed[t], ran[t], strength])
+
     @classmethod
     def average_tables(cls, tables):
         table = tables[0]
@@ -70,7 +99,9 @@ class GradeScript(Script):
         return avg_table
 
     @classmethod
-    def compute_tournament_points(cls, table, solution_name):
+    def compute_tournament_points(cls, table, solution_name, defensive_pts=None, offensive_pts=None):
+        defensive_pts = cls.DEFENSIVE_PTS if defensive_pts is None else defensive_pts
+        offensive_pts = cls.OFFENSIVE_PTS if offensive_pts is None else offensive_pts
         n_rows = len(table)
         n_cols = len(table[0])
         solution_col = None
@@ -98,11 +129,11 @@ class GradeScript(Script):
 
             for i in range(1, n_rows):
                 if i != j:
-                    d_score += cls.DEFENSIVE_PTS * cls.parse_fraction(table[j][i])
+                    d_score += defensive_pts * cls.parse_fraction(table[j][i])
 
             for k in range(1, n_cols):
                 if k != j and k < len(table[j]):
-                    o_score += cls.OFFENSIVE_PTS * (1 - cls.parse_fraction(table[k][j]))
+                    o_score += offensive_pts * (1 - cls.parse_fraction(table[k][j]))
 
             scores['defensive'].append(round(d_score, 2))
             scores['offensive'].append(round(o_score, 2))
@@ -133,7 +164,7 @@ class GradeScript(Script):
                     avg_scores['coherence'][i])
             competitive_total.append(total)
 
-        max_score = max(competitive_total) if competitive_total else 1
+        max_score = max(competitive_total, default=0) or 1
 
         summary.append(["Defensive Points"] + [f"{s:.2f}" for s in avg_scores['defensive']])
         summary.append(["Offensive Points"] + [f"{s:.2f}" for s in avg_scores['offensive']])
@@ -146,10 +177,11 @@ class GradeScript(Script):
         return summary
 
     @classmethod
-    def grade(cls, toolchain_paths, output_path, solution_name):
-        tables = [cls.load_csv(path) for path in toolchain_paths]
+    def grade(cls, toolchain_paths, output_path, solution_name,
+              defensive_pts=None, offensive_pts=None, test_strength_path=None):
+        tables = [cls.load_table(path) for path in toolchain_paths]
         avg_table = cls.average_tables(tables)
-        scores = cls.compute_tournament_points(avg_table, solution_name)
+        scores = cls.compute_tournament_points(avg_table, solution_name, defensive_pts, offensive_pts)
 
         with open(output_path, 'w', newline='') as f:
             writer = csv.writer(f)
@@ -160,13 +192,19 @@ class GradeScript(Script):
 
         print(f"Grading complete. Output written to {output_path}")
         print(f"Solution name used: '{solution_name}'")
+
+        if test_strength_path:
+            matrix_paths = [path for path in toolchain_paths if Path(path).suffix == ".npz"]
+            cls.write_test_strength(matrix_paths, test_strength_path)
+            print(f"Test strength written to {test_strength_path}")
         return 0
 
     @classmethod
     def main(cls, args: List[str]) -> int:
         parser = cls.get_parser()
         parsed_args = parser.parse_args(args)
-        return cls.grade(parsed_args.tournament_csvs, parsed_args.output_csv, parsed_args.solution_name)
+        return cls.grade(parsed_args.tournament_csvs, parsed_args.output_csv, parsed_args.solution_name,
+                         parsed_args.defensive_pts, parsed_args.offensive_pts, parsed_args.test_strength)
 
 if __name__ == "__main__":
     sys.exit(GradeScript.main(sys.argv[1:]))
@@ -12,6 +12,16 @@ Desc: Dragon-runner with a config pointing to the performance tests & an
 
       The intention is that the single row be manually copy and pasted into the
       row output by the grade.py script.
+
+      Given perf_long.csv instead, failed and timed out tests are known and are
+      scored with a penalty instead of as slow runs, and memory footprint (peak
+      RSS or page faults) can be scored instead of time. mem.csv, the wide peak
+      RSS matrix, is also accepted.
+
+      Several perf_long.csv files measured on different machines are graded as
+      one scoreboard. Runs made with --calibrate record how long their machine
+      took for a reference workload, and each file's times are scaled by the
+      median calibration over the files divided by its own.
 ================================================================================
 """
 import sys
@@ -19,9 +29,19 @@ import argparse
 import csv
 import numpy as np
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from dragon_runner.scripts.base import Script
+from dragon_runner.src.perf import read_long
+
+SCHEMES = ["fastest", "geomean", "solution", "rank"]
 
+# Lowest ratio the geomean scheme takes the log of, so that a failure scored with
+# the default penalty of 0 costs a team as much as being 100x slower on that test
+# instead of zeroing its whole score
+GEOMEAN_FLOOR = 0.01
+
+# Column of perf_long.csv scored by each metric, lower is better for all of them
+METRICS = {"time": "median", "maxrss": "maxrss", "faults": "faults"}
 
 class GradePerfScript(Script):
 
@@ -42,51 +62,202 @@ class GradePerfScript(Script):
         parser.add_argument(
             "perf_csv",
             type=Path,
-            help="Path to csv file generated from grade mode"
+            nargs="+",
+            help="Path to perf.csv or perf_long.csv generated from perf mode, or several "
+                 "perf_long.csv files from different machines"
         )
         parser.add_argument(
             "output_csv",
             type=Path,
             help="Path to final output csv with grades"
         )
+        parser.add_argument(
+            "--scheme",
+            choices=SCHEMES,
+            default="fastest",
+            help="fastest: mean of fastest/time, geomean: geometric mean of fastest/time floored at 0.01, "
+                 "solution: mean of solution/time, rank: mean share of teams beaten (default: fastest)"
+        )
+        parser.add_argument(
+            "--metric",
+            choices=list(METRICS),
+            default="time",
+            help="What perf_long.csv is scored on: time, maxrss (peak RSS) or faults (default: time)"
+        )
+        parser.add_argument(
+            "--solution-name",
+            default="solution",
+            help="Executable the solution scheme compares against (default: 'solution')"
+        )
+        parser.add_argument(
+            "--fail-penalty",
+            type=float,
+            default=0.0,
+            help="Score of a test the executable failed (default: 0)"
+        )
+        parser.add_argument(
+            "--timeout-penalty",
+            type=float,
+            default=0.0,
+            help="Score of a test the executable timed out on (default: 0)"
+        )
         return parser
 
     @staticmethod
-    def grade_perf(*args):
-        if len(args) < 2:
-            print("Must supply two arguments: <perf_csv> <output_csv>")
-            return 1
-
-        with open(args[0], "r") as perf_csv:
+    def load_wide(path) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Read perf.csv or mem.csv into a tests x executables matrix. The wide format has
+        no statuses, so every cell counts as a pass unless it is blank.
+        """
+        with open(path, "r") as perf_csv:
             reader = csv.reader(perf_csv)
             headers = next(reader)
             test_data = [row for row in reader if row and any(row)]
+        times = np.array([[float(x) if x else np.nan for x in row[1:]] for row in test_data], dtype=float)
+        times = times.reshape(len(test_data), len(headers) - 1)
+        return headers[1:], times, np.where(np.isnan(times), "fail", "pass").astype(object)
 
-        raw_times = np.array([[float(x) for x in row[1:]] for row in test_data])
+    @classmethod
+    def load_long(cls, path, column: str="median") -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Read the score rows of perf_long.csv into tests x executables matrices of the
+        chosen statistic and of statuses. Missing cells are treated as failures.
+        """
+        return cls.to_matrix(read_long(path), column)
 
-        scores = []
-        for times in raw_times:
-            fastest_time = min(times)
-            test_scores = [fastest_time / time for time in times]
-            scores.append(test_scores)
-        total_scores = np.mean(scores, axis=0)
+    @staticmethod
+    def calibration(rows: List[Dict[str, str]]) -> Optional[float]:
+        values = [float(row["calibration"]) for row in rows if row.get("calibration")]
+        return values[0] if values and values[0] > 0 else None
 
-        print(headers[1:])
+    @classmethod
+    def load_calibrated(cls, paths, column: str="median",
+                        normalize: bool=True) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Merge perf_long.csv files from several machines. With normalize, each file's
+        times are scaled by the median calibration of the files over its own, so every
+        file is put on the scale of a typical machine. A cell measured in more than one
+        file keeps the result from the last of them.
+        """
+        files = [read_long(path) for path in paths]
+        calibrations = [cls.calibration(rows) for rows in files]
+        if normalize and None in calibrations:
+            uncalibrated = [str(path) for path, c in zip(paths, calibrations) if c is None]
+            print(f"Not normalizing, no calibration in: {', '.join(uncalibrated)}")
+            normalize = False
+
+        merged: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+        reference = float(np.median(calibrations)) if normalize else None
+        for rows, c in zip(files, calibrations):
+            for row in rows:
+                if normalize and row.get(column):
+                    row = {**row, column: str(float(row[column]) * reference / c)}
+                merged[(row["executable"], row["toolchain"], row["test"])] = row
+        return cls.to_matrix(list(merged.values()), column)
+
+    @staticmethod
+    def to_matrix(rows: List[Dict[str, str]], column: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        exes = list(dict.fromkeys(row["executable"] for row in rows))
+        tests = list(dict.fromkeys((row["toolchain"], row["test"]) for row in rows))
+        exe_index = {exe: i for i, exe in enumerate(exes)}
+        test_index = {test: i for i, test in enumerate(tests)}
+
+        times = np.full((len(tests), len(exes)), np.nan)
+        status = np.full((len(tests), len(exes)), "fail", dtype=object)
+        for row in rows:
+            t, e = test_index[(row["toolchain"], row["test"])], exe_index[row["executable"]]
+            status[t, e] = row["status"]
+            if row.get(column):
+                times[t, e] = float(row[column])
+        return exes, times, status
+
+    @classmethod
+    def load(cls, paths, metric: str="time") -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Load one perf file of either format, or merge several long-format files. Only
+        times are normalized across machines, memory footprints are not scaled.
+        """
+        paths = paths if isinstance(paths, list) else [paths]
+        headers = []
+        for path in paths:
+            with open(path, "r") as f:
+                headers.append(f.readline())
+        if not all(header.startswith("executable,") for header in headers):
+            if len(paths) > 1:
+                raise ValueError("Only perf_long.csv files can be graded together")
+            return cls.load_wide(paths[0])
+        if len(paths) == 1:
+            return cls.load_long(paths[0], METRICS[metric])
+        return cls.load_calibrated(paths, METRICS[metric], normalize=(metric == "time"))
+
+    @staticmethod
+    def score(times: np.ndarray, status: np.ndarray, scheme: str="fastest",
+              solution: Optional[int]=None, fail_penalty: float=0.0,
+              timeout_penalty: float=0.0) -> np.ndarray:
+        """
+        Score every executable from tests x executables times and statuses. Only passing
+        cells are compared; failures and timeouts score their penalty on that test. The
+        geomean scheme floors every ratio, penalties included, at GEOMEAN_FLOOR.
+        """
+        passed = (status == "pass") & np.isfinite(times) & (times > 0)
+        penalty = np.where(status == "timeout", timeout_penalty, fail_penalty)
+        masked = np.where(passed, times, np.inf)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if scheme == "solution":
+                if solution is None:
+                    raise ValueError("The solution scheme needs the solution's executable")
+                reference = masked[:, [solution]]
+                ratio = np.where(passed, reference / masked, penalty)
+                # tests the solution itself failed cannot be compared against
+                ratio[~np.isfinite(reference[:, 0]), :] = np.nan
+                return np.nanmean(ratio, axis=0)
+
+            if scheme == "rank":
+                # share of the other executables beaten, counting their failures as losses
+                n_others = max(times.shape[1] - 1, 1)
+                slower = (masked[:, None, :] > masked[:, :, None]).sum(axis=2)
+                ties = (masked[:, None, :] == masked[:, :, None]).sum(axis=2) - 1
+                ratio = np.where(passed, (slower + 0.5 * ties) / n_others, penalty)
+                return ratio.mean(axis=0)
+
+            fastest = masked.min(axis=1, keepdims=True)
+            ratio = np.where(passed, fastest / masked, penalty)
+            if scheme == "geomean":
+                return np.exp(np.log(np.maximum(ratio, GEOMEAN_FLOOR)).mean(axis=0))
+            return ratio.mean(axis=0)
+
+    @classmethod
+    def grade_perf(cls, perf_csv, output_csv, scheme: str="fastest", solution_name: str="solution",
+                   fail_penalty: float=0.0, timeout_penalty: float=0.0, metric: str="time"):
+        try:
+            exes, times, status = cls.load(perf_csv, metric)
+        except ValueError as e:
+            print(e)
+            return 1
+        solution = exes.index(solution_name) if solution_name in exes else None
+        if scheme == "solution" and solution is None:
+            print(f"Solution executable '{solution_name}' not found in {perf_csv}")
+            return 1
+        total_scores = cls.score(times, status, scheme, solution, fail_penalty, timeout_penalty)
+
+        print(exes)
         print(total_scores)
 
         # Write results to output CSV
-        with open(args[1], "w") as output_csv:
+        with open(output_csv, "w") as output_csv:
             writer = csv.writer(output_csv)
-            writer.writerow(headers[1:])
+            writer.writerow(exes)
             writer.writerow(total_scores)
+        return 0
 
     @classmethod
     def main(cls, args: List[str]) -> int:
         parser = cls.get_parser()
         parsed_args = parser.parse_args(args)
-        cls.grade_perf(parsed_args.perf_csv, parsed_args.output_csv)
-        return 0
+        return cls.grade_perf(parsed_args.perf_csv, parsed_args.output_csv, parsed_args.scheme,
+                              parsed_args.solution_name, parsed_args.fail_penalty, parsed_args.timeout_penalty,
+                              parsed_args.metric)
 
 if __name__ == "__main__":
     sys.exit(GradePerfScript.main(sys.argv[1:]))
-    
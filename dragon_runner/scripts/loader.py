@@ -22,6 +22,7 @@ class Loader:
             "gen-config":    "dragon_runner.scripts.gen_config",
             "grade":         "dragon_runner.scripts.grade",
             "grade-perf":    "dragon_runner.scripts.grade_perf",
+            "perf-baseline": "dragon_runner.scripts.perf_baseline",
         }
 
     def _load_script_class(self, module_name: str) -> Optional[Type[Script]]:
@@ -0,0 +1,124 @@
+"""
+============================== 415 Grading Script ==============================
+Name: perf_baseline.py
+Desc: Keep a baseline of per-test perf samples for each executable and compare
+      new perf runs against it.
+
+      save:    record the trials in perf_long.csv as the executables' baseline.
+      compare: run a Mann-Whitney U test per test between the new trials and the
+               baseline, report significant regressions and improvements with
+               their effect sizes, and exit nonzero if anything regressed.
+================================================================================
+"""
+import sys
+import argparse
+import csv
+import statistics
+from pathlib import Path
+from typing import Dict, List
+from dragon_runner.scripts.base import Script
+from dragon_runner.src.baseline import BaselineStore
+from dragon_runner.src.perf import read_long
+from dragon_runner.src.stats import cliffs_delta, mann_whitney
+
+
+class PerfBaselineScript(Script):
+
+    @classmethod
+    def name(cls) -> str:
+        return "perf-baseline"
+
+    @classmethod
+    def description(cls) -> str:
+        return "Save perf baselines and detect regressions against them"
+
+    @classmethod
+    def get_parser(cls) -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(
+            prog="perf-baseline",
+            description="Save perf baselines and detect regressions against them"
+        )
+        parser.add_argument("action", choices=["save", "compare"],
+                            help="save: store perf_long.csv as the baseline, compare: test it against the baseline")
+        parser.add_argument("perf_long_csv", type=Path, help="perf_long.csv written by perf mode")
+        parser.add_argument("baseline", type=Path, help="Baseline JSON file")
+        parser.add_argument("--alpha", type=float, default=0.05,
+                            help="Significance level of the per-test test (default: 0.05)")
+        parser.add_argument("--min-change", type=float, default=0.05,
+                            help="Ignore median changes smaller than this fraction (default: 0.05)")
+        parser.add_argument("-o", "--output", type=Path, default=None,
+                            help="Write every comparison to this CSV")
+        return parser
+
+    @staticmethod
+    def compare_cell(current: List[float], baseline: List[float], alpha: float, min_change: float) -> Dict:
+        """
+        Compare the trials of one test. Positive changes and effect sizes mean slower.
+        """
+        _, p_value = mann_whitney(current, baseline)
+        base_median = statistics.median(baseline)
+        cur_median = statistics.median(current)
+        change = (cur_median - base_median) / base_median if base_median > 0 else 0.0
+        verdict = "same"
+        if p_value < alpha and abs(change) >= min_change:
+            verdict = "regression" if change > 0 else "improvement"
+        return {
+            "baseline_median": round(base_median, 6),
+            "current_median": round(cur_median, 6),
+            "change": round(change, 4),
+            "effect": round(cliffs_delta(current, baseline), 4),
+            "p_value": round(p_value, 6),
+            "verdict": verdict
+        }
+
+    @classmethod
+    def compare(cls, rows: List[Dict[str, str]], store: BaselineStore,
+                alpha: float, min_change: float) -> List[Dict]:
+        results = []
+        for row in rows:
+            base = store.get(row["executable"], row["toolchain"], row["test"])
+            if base is None:
+                continue
+            result = {"executable": row["executable"], "toolchain": row["toolchain"], "test": row["test"]}
+            current = [float(s) for s in row["samples"].split()]
+            if row["status"] != "pass" and base["status"] == "pass":
+                result.update(verdict=f"regression ({row['status']})")
+            elif row["status"] != "pass" or base["status"] != "pass" or not current or not base["samples"]:
+                continue
+            else:
+                result.update(cls.compare_cell(current, base["samples"], alpha, min_change))
+            results.append(result)
+        return results
+
+    @classmethod
+    def main(cls, args: List[str]) -> int:
+        parser = cls.get_parser()
+        parsed_args = parser.parse_args(args)
+        rows = read_long(parsed_args.perf_long_csv)
+        store = BaselineStore(str(parsed_args.baseline))
+
+        if parsed_args.action == "save":
+            store.record(rows)
+            store.save()
+            print(f"Saved baseline of {len(rows)} tests to {parsed_args.baseline}")
+            return 0
+
+        results = cls.compare(rows, store, parsed_args.alpha, parsed_args.min_change)
+        regressions = [r for r in results if r["verdict"].startswith("regression")]
+        improvements = [r for r in results if r["verdict"] == "improvement"]
+        for r in regressions + improvements:
+            detail = f" {r['change']:+.1%} (effect {r['effect']:+.2f}, p={r['p_value']:.4f})" if "change" in r else ""
+            print(f"{r['verdict'].upper():<12} {r['executable']} {r['toolchain']} {r['test']}{detail}")
+        print(f"Compared {len(results)} tests: {len(regressions)} regressions, {len(improvements)} improvements")
+
+        if parsed_args.output:
+            columns = ["executable", "toolchain", "test", "baseline_median", "current_median",
+                       "change", "effect", "p_value", "verdict"]
+            with open(parsed_args.output, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(results)
+        return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(PerfBaselineScript.main(sys.argv[1:]))
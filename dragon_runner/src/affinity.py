@@ -0,0 +1,93 @@
+import os
+import threading
+from contextlib                     import contextmanager
+from typing                         import FrozenSet, Iterable, Iterator, List, Optional
+from dragon_runner.src.log          import log
+
+def affinity_supported() -> bool:
+    return hasattr(os, "sched_setaffinity")
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """
+    Parse a Linux style CPU list such as "0-3,6" into sorted CPU numbers.
+    """
+    cpus = set()
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            cpus.update(range(int(lo), int(hi) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+def format_cpu_list(cpus: Iterable[int]) -> str:
+    """
+    Format CPU numbers compactly, the inverse of parse_cpu_list.
+    """
+    ranges: List[List[int]] = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in ranges)
+
+def pin_harness(spec: str):
+    """
+    Restrict the harness process (and threads started after this) to its own CPUs.
+    """
+    if not affinity_supported():
+        log("CPU affinity is not supported on this platform, ignoring --harness-cpus")
+        return
+    cpus = parse_cpu_list(spec)
+    os.sched_setaffinity(0, cpus)
+    log(f"Pinned harness to CPUs {format_cpu_list(cpus)}")
+
+class CpuAllocator:
+    """
+    Splits the CPUs reserved for measurements into sets of cpus_per_trial CPUs and
+    hands them out to trials. At most per_set trials share a set at any time, so by
+    default every running trial has its CPUs to itself.
+    """
+    def __init__(self, cpus: List[int], cpus_per_trial: int=0, per_set: int=1):
+        allowed = os.sched_getaffinity(0)
+        missing = [cpu for cpu in cpus if cpu not in allowed]
+        if missing:
+            raise ValueError(f"CPUs {format_cpu_list(missing)} are not available to this process")
+        size = cpus_per_trial if cpus_per_trial > 0 else len(cpus)
+        self.sets: List[FrozenSet[int]] = [frozenset(cpus[i:i + size])
+                                           for i in range(0, len(cpus) - size + 1, size)]
+        if not self.sets:
+            raise ValueError(f"Cannot make a set of {size} CPUs from {format_cpu_list(cpus)}")
+        self.per_set    = max(1, per_set)
+        self.in_use     = [0] * len(self.sets)
+        self.condition  = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.sets) * self.per_set
+
+    @contextmanager
+    def acquire(self) -> Iterator[FrozenSet[int]]:
+        """
+        Wait for the least used CPU set with room for another trial.
+        """
+        with self.condition:
+            while min(self.in_use) >= self.per_set:
+                self.condition.wait()
+            index = self.in_use.index(min(self.in_use))
+            self.in_use[index] += 1
+        try:
+            yield self.sets[index]
+        finally:
+            with self.condition:
+                self.in_use[index] -= 1
+                self.condition.notify()
+
+def make_allocator(spec: str, cpus_per_trial: int, per_set: int) -> Optional[CpuAllocator]:
+    if not spec:
+        return None
+    if not affinity_supported():
+        log("CPU affinity is not supported on this platform, ignoring --pin-cpus")
+        return None
+    return CpuAllocator(parse_cpu_list(spec), cpus_per_trial, per_set)
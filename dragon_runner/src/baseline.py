@@ -0,0 +1,35 @@
+from datetime                       import datetime
+from typing                         import Dict, List, Optional
+from dragon_runner.src.utils        import file_to_json, json_to_file
+
+class BaselineStore:
+    """
+    Per-test perf samples of each executable id from a reference run, which later
+    runs of the same executable are compared against.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Dict]] = file_to_json(path) or {}
+
+    @staticmethod
+    def key(toolchain: str, test: str) -> str:
+        return f"{toolchain}:{test}"
+
+    def record(self, rows: List[Dict[str, str]]):
+        """
+        Store the score rows of a perf_long.csv, replacing earlier baselines of the
+        executables and tests they cover.
+        """
+        recorded = datetime.now().isoformat(timespec="seconds")
+        for row in rows:
+            self.entries.setdefault(row["executable"], {})[self.key(row["toolchain"], row["test"])] = {
+                "status": row["status"],
+                "samples": [float(s) for s in row["samples"].split()],
+                "recorded": recorded
+            }
+
+    def get(self, exe: str, toolchain: str, test: str) -> Optional[Dict]:
+        return self.entries.get(exe, {}).get(self.key(toolchain, test))
+
+    def save(self):
+        json_to_file(self.path, self.entries)
@@ -0,0 +1,98 @@
+import os
+import hashlib
+import threading
+from typing                         import Dict, Optional
+from dragon_runner.src.config       import Executable
+from dragon_runner.src.toolchain    import ToolChain
+from dragon_runner.src.testfile     import TestFile
+from dragon_runner.src.runner       import TestResult
+from dragon_runner.src.utils        import file_to_json, json_to_file, bytes_to_b64, b64_to_bytes,\
+                                           file_digest
+
+def result_key(tc: ToolChain, test: TestFile, exe: Executable, timeout: float) -> str:
+    """
+    Identify a (toolchain, executable, test) combination by content rather than by
+    name, so identical binaries and tests map to the same key.
+    """
+    parts = [tc.digest, exe.digest or exe.exe_path, test.digest, str(timeout)]
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+class ResultCache:
+    """
+    Persistent store of test verdicts keyed on everything that can change them:
+    the test and its expected output, the tested executable and runtime, the
+    toolchain and the timeout. Timeouts are never cached since they depend on load.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = file_to_json(path) or {}
+
+    @staticmethod
+    def key(tc: ToolChain, test: TestFile, exe: Executable, timeout: float) -> str:
+        return result_key(tc, test, exe, timeout)
+
+    def get(self, key: str, test: TestFile) -> Optional[TestResult]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        tr = TestResult(test=test, did_pass=entry["did_pass"])
+        tr.error_test = entry["error_test"]
+        tr.memory_leak = entry["memory_leak"]
+        tr.leaked_bytes = entry.get("leaked_bytes")
+        tr.leak_allocations = entry.get("leak_allocations")
+        tr.time = entry["time"]
+        tr.failing_step = entry["failing_step"]
+        tr.gen_output = b64_to_bytes(entry["gen_output"]) if entry["gen_output"] else None
+        tr.cached = True
+        return tr
+
+    def put(self, key: str, tr: TestResult):
+        if tr.did_timeout:
+            return
+        self.entries[key] = {
+            "did_pass": tr.did_pass,
+            "error_test": tr.error_test,
+            "memory_leak": tr.memory_leak,
+            "leaked_bytes": tr.leaked_bytes,
+            "leak_allocations": tr.leak_allocations,
+            "time": tr.time,
+            "failing_step": tr.failing_step,
+            "gen_output": bytes_to_b64(tr.gen_output) if tr.gen_output else None
+        }
+
+    def save(self):
+        json_to_file(self.path, self.entries)
+
+class LeakCache(ResultCache):
+    """
+    Persistent store of the verdicts of a toolchain's leak check step onwards, keyed
+    on the compiled artifact the step checks instead of the tested executable, so
+    unchanged binaries are not run under the leak checker again. Shared by the
+    workers of a parallel memcheck run.
+    """
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def artifact_key(tc: ToolChain, step_index: int, artifact: str,
+                     test: TestFile, timeout: float) -> Optional[str]:
+        if not os.path.isfile(artifact):
+            return None
+        expected = test.expected_out if isinstance(test.expected_out, bytes) else b''
+        parts = [tc.digest, str(step_index), file_digest(artifact),
+                 hashlib.sha256(test.get_input_stream() or b'').hexdigest(),
+                 hashlib.sha256(expected).hexdigest(), str(timeout)]
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+    def get(self, key: str, test: TestFile) -> Optional[TestResult]:
+        with self.lock:
+            return super().get(key, test)
+
+    def put(self, key: str, tr: TestResult):
+        with self.lock:
+            super().put(key, tr)
+
+    def save(self):
+        with self.lock:
+            super().save()
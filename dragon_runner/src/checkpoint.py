@@ -0,0 +1,81 @@
+import os
+import json
+from typing                         import Dict, List, Optional, Tuple
+from dragon_runner.src.log          import log
+
+CellKey = Tuple[str, str, str, str]
+Hashes = Tuple[str, str, str]
+
+class CheckpointStore:
+    """
+    Append-only log of completed tournament verdicts, one JSON object per line, so
+    an interrupted tournament can be resumed without rerunning finished tests.
+    Tests are identified by their path relative to the attacking package.
+
+    Each verdict also stores hashes of the toolchain, the defending executable and
+    the test. A verdict is only reused while all three are unchanged, so when a team
+    resubmits, only its row (as defender) and its changed tests are recomputed.
+    Teams listed in recompute have their whole row and column rerun regardless.
+    """
+    def __init__(self, path: str, resume: bool=False, recompute: Optional[List[str]]=None):
+        self.path = path
+        self.recompute = set(recompute or [])
+        self.verdicts: Dict[CellKey, Tuple[bool, Hashes]] = {}
+        if resume:
+            self.load()
+        self.file = open(path, 'a' if resume else 'w')
+
+    def load(self):
+        """
+        Read previously recorded verdicts. A torn final line from a crash is ignored.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = (record["toolchain"], record["defender"], record["attacker"], record["test"])
+                    if record["defender"] in self.recompute or record["attacker"] in self.recompute:
+                        continue
+                    hashes = (record["toolchain_hash"], record["defender_hash"], record["test_hash"])
+                    self.verdicts[key] = (record["passed"], hashes)
+                except (ValueError, KeyError):
+                    continue
+        log(f"Resuming from {len(self.verdicts)} recorded verdicts in {self.path}")
+
+    def get(self, toolchain: str, defender: str, attacker: str, test: str, hashes: Hashes) -> Optional[bool]:
+        """
+        Return the recorded verdict if one exists for the same toolchain, binary and test.
+        """
+        recorded = self.verdicts.get((toolchain, defender, attacker, test))
+        if recorded is None or recorded[1] != hashes:
+            return None
+        return recorded[0]
+
+    def record(self, toolchain: str, defender: str, attacker: str, test: str,
+               hashes: Hashes, passed: bool):
+        self.verdicts[(toolchain, defender, attacker, test)] = (passed, hashes)
+        self.file.write(json.dumps({
+            "toolchain": toolchain,
+            "defender": defender,
+            "attacker": attacker,
+            "test": test,
+            "passed": passed,
+            "toolchain_hash": hashes[0],
+            "defender_hash": hashes[1],
+            "test_hash": hashes[2]
+        }) + '\n')
+        self.file.flush()
+
+    def sync(self):
+        """
+        Force recorded verdicts to disk so they survive a node reboot.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
@@ -4,7 +4,7 @@ from dragon_runner.scripts.loader import Loader
 from enum import Enum
 import argparse
 from enum import Enum
-from typing import List, NamedTuple, Protocol, runtime_checkable
+from typing import List, NamedTuple, Optional, Protocol, runtime_checkable
 from pathlib import Path
 import argparse
 import sys
@@ -14,6 +14,8 @@ class Mode(Enum):
     REGULAR = "regular"
     TOURNAMENT = "tournament"
     PERF = "perf"
+    SCALING = "scaling"
+    COMBINED = "combined"
     MEMCHECK = "memcheck"
     SERVE = "serve"
     SCRIPT = "script"
@@ -35,6 +37,37 @@ class RunnerArgs(NamedTuple):
     verify: bool = False
     show_testcase: bool = False
     fast_fail: bool = False
+    stage: bool = False
+    stage_dir: str = ""
+    incremental: bool = False
+    cache_file: str = ".dragon-runner-cache.json"
+    failed_first: bool = False
+    longest_first: bool = False
+    history_file: str = ""
+    probe: bool = True
+    breaker: int = 5
+    dedup: bool = True
+    validate: bool = False
+    jobs: int = 1
+    resume: bool = False
+    checkpoint_file: str = "tournament_checkpoint.jsonl"
+    recompute: List[str] = []
+    sample: bool = False
+    ci_width: float = 0.1
+    min_samples: int = 10
+    seed: Optional[int] = None
+    warmup: int = 0
+    trials: int = 1
+    max_trials: int = 0
+    rel_ci: float = 0.05
+    interleave: bool = False
+    pin_cpus: str = ""
+    harness_cpus: str = ""
+    cpus_per_trial: int = 0
+    trials_per_set: int = 1
+    calibrate: bool = False
+    calibration_dir: str = ""
+    leak_cache: str = ""
 
 class ScriptArgs(NamedTuple):
     mode: Mode
@@ -59,6 +92,52 @@ def parse_runner_args(argv_skip: int=1) -> RunnerArgs:
     parser.add_argument("-s", "--show-testcase", action="store_true")
     parser.add_argument("-o", "--output", default="")
     parser.add_argument("-f", "--fast-fail", dest="fast_fail", action="store_true")
+    parser.add_argument("--stage", action="store_true", help="Copy executables, runtimes and tests to RAM before running")
+    parser.add_argument("--stage-dir", default="", help="Directory to stage into (default: /dev/shm)")
+    parser.add_argument("--incremental", action="store_true", help="Reuse cached verdicts for unchanged tests")
+    parser.add_argument("--cache-file", default=".dragon-runner-cache.json", help="Result cache used by --incremental")
+    parser.add_argument("--failed-first", action="store_true", help="Run tests which failed last run first")
+    parser.add_argument("--longest-first", action="store_true", help="Run the slowest tests from last run first")
+    parser.add_argument("--history-file", default="", help="Record test history to this file (default with --failed-first or --longest-first: .dragon-runner-history.json)")
+    parser.add_argument("--no-probe", dest="probe", action="store_false", help="Skip the smoke probe of each executable")
+    parser.add_argument("--breaker", type=int, default=5, help="Fail remaining tests after N identical startup failures (0 to disable)")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false", help="Run identical executables and tests separately")
+    parser.add_argument("--validate", action="store_true", help="Reject attacking tests the solution fails before a tournament")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of tests to run in parallel")
+    parser.add_argument("--resume", action="store_true", help="Skip tournament verdicts already in the checkpoint")
+    parser.add_argument("--checkpoint", dest="checkpoint_file", default="tournament_checkpoint.jsonl",
+                        help="Tournament checkpoint file (default: tournament_checkpoint.jsonl)")
+    parser.add_argument("--recompute", action="append", default=[], metavar="TEAM",
+                        help="Resume, but rerun TEAM's row and column (repeatable)")
+    parser.add_argument("--sample", action="store_true",
+                        help="Estimate tournament pass rates from a stratified sample of each cell's tests")
+    parser.add_argument("--ci-width", type=float, default=0.1,
+                        help="Stop sampling a cell once its 95%% interval is this narrow (default: 0.1)")
+    parser.add_argument("--min-samples", type=int, default=10,
+                        help="Tests to run in a cell before its interval is checked (default: 10)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for sampling and interleaved perf trials")
+    parser.add_argument("--warmup", type=int, default=0, help="Perf only: untimed runs before each test's trials")
+    parser.add_argument("--trials", type=int, default=1, help="Perf only: measured trials per test (default: 1)")
+    parser.add_argument("--max-trials", type=int, default=0,
+                        help="Perf only: keep adding trials up to this many until the interval is narrow enough")
+    parser.add_argument("--rel-ci", type=float, default=0.05,
+                        help="Perf only: target 95%% interval half-width relative to the mean (default: 0.05)")
+    parser.add_argument("--interleave", action="store_true",
+                        help="Perf only: run each test's trials round-robin across executables in a random order")
+    parser.add_argument("--pin-cpus", default="", metavar="LIST",
+                        help="Perf only: pin measured trials to these CPUs, e.g. 2-7")
+    parser.add_argument("--harness-cpus", default="", metavar="LIST",
+                        help="Perf only: keep the harness itself on these CPUs, e.g. 0-1")
+    parser.add_argument("--cpus-per-trial", type=int, default=0,
+                        help="Perf only: split --pin-cpus into sets of this many CPUs (default: one set)")
+    parser.add_argument("--trials-per-set", type=int, default=1,
+                        help="Perf only: concurrent trials allowed on one CPU set (default: 1)")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Perf only: time the solutionExecutable on a reference workload first")
+    parser.add_argument("--calibration-dir", default="", metavar="DIR",
+                        help="Perf only: tests of the reference workload (default: the config's tests)")
+    parser.add_argument("--leak-cache", default="", metavar="FILE",
+                        help="Memcheck only: reuse leak check verdicts of unchanged compiled artifacts")
     
     # Parse arguments
     args = parser.parse_args(sys.argv[argv_skip:])
@@ -88,7 +167,7 @@ def parse_server_args() -> ServerArgs:
 def parse_cli_args() -> Any:
     if len(sys.argv) < 2:
         print("Usage: dragon-runner [mode] config.json [args...]")
-        print("  mode: [regular|tournament|perf|memcheck|serve|script])")
+        print("  mode: [regular|tournament|perf|scaling|memcheck|combined|serve|script])")
         print("  args: dragon-runner -h")
         sys.exit(1)
         
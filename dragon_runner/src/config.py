@@ -1,12 +1,13 @@
 import json
 import os
 import sys
+import hashlib
 from pathlib                        import Path
 from typing                         import Dict, List, Optional
 from dragon_runner.src.testfile     import TestFile
 from dragon_runner.src.errors       import ConfigError, Verifiable, ErrorCollection
 from dragon_runner.src.toolchain    import ToolChain
-from dragon_runner.src.utils        import resolve_relative
+from dragon_runner.src.utils        import resolve_relative, file_digest
 from dragon_runner.src.log          import log
 from dragon_runner.src.cli          import RunnerArgs
 
@@ -105,7 +106,17 @@ class Executable(Verifiable):
         self.exe_path   = exe_path 
         self.runtime    = runtime 
         self.errors     = self.verify()
+        self.digest     = self.compute_digest() if not self.errors else ""
     
+    def compute_digest(self) -> str:
+        """
+        Hash the binary together with its runtime so identical submissions can share results.
+        """
+        sha = hashlib.sha256(file_digest(self.exe_path).encode())
+        if self.runtime:
+            sha.update(file_digest(self.runtime).encode())
+        return sha.hexdigest()
+
     def verify(self) -> ErrorCollection:
         """
         Check if the binary path exists and runtime path exists (if present)
@@ -174,6 +185,7 @@ class Config:
         self.executables        = self.parse_executables(config_data['testedExecutablePaths'],
                                                    config_data.get('runtimes', ""))
         self.solution_exe       = config_data.get('solutionExecutable', None)
+        self.leak_checker       = self.parse_leak_checker(config_data.get('leakChecker', None))
         self.toolchains         = self.parse_toolchains(config_data['toolchains'])
         self.packages           = self.gather_packages()
         self.error_collection   = self.verify()
@@ -196,6 +208,15 @@ class Config:
                     find_runtime(id)
                 ) for id, path in executables_data.items()]
     
+    def parse_leak_checker(self, leak_checker: Optional[List[str]]) -> Optional[List[str]]:
+        """
+        The command prefix used to leak check artifacts in combined mode, with its
+        executable resolved like the tested executables.
+        """
+        if not leak_checker:
+            return None
+        return [resolve_relative(leak_checker[0], self.config_path)] + leak_checker[1:]
+
     def parse_toolchains(self, toolchains_data: Dict[str, List[Dict]]) -> List[ToolChain]:
         """
         Parse each toolchain from the config file and return a list of them.
@@ -243,6 +264,8 @@ class Config:
             ec.extend(tc.verify().errors)
         for pkg in self.packages:
             ec.extend(pkg.verify().errors)
+        if self.leak_checker and not os.path.exists(self.leak_checker[0]):
+            ec.add(ConfigError(f"Cannot find leak checker: {self.leak_checker[0]}"))
         return ec
 
     def to_dict(self) -> Dict: 
@@ -0,0 +1,114 @@
+import os
+import queue
+import threading
+from typing                         import Dict, List, NamedTuple, Optional
+from dragon_runner.src.log          import log
+from dragon_runner.src.runner       import TestResult
+from dragon_runner.src.testfile     import TestFile
+
+# Generated output beyond this many bytes is trimmed in feedback files
+MAX_FEEDBACK_BYTES = 10000
+
+class FeedbackRecord(NamedTuple):
+    """
+    The compact part of a failed TestResult needed to render its feedback.
+    """
+    file: str
+    test: TestFile
+    gen_output: Optional[bytes]
+    skip_reason: Optional[str]
+
+class LineRecord(NamedTuple):
+    file: str
+    line: str
+
+class FeedbackWriter:
+    """
+    Renders feedback files on a background thread so the test loop only hands off
+    small records. Each test's contents are rendered once no matter how many
+    defenders fail it, and queued records are batched into one write per file.
+    """
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue()
+        self.rendered: Dict[str, str] = {}
+        try:
+            self.term_width = os.get_terminal_size().columns
+        except OSError:
+            self.term_width = 80
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def feedback(self, file: str, result: TestResult):
+        """
+        Queue feedback for a failed test. Only the part of the generated output which
+        survives trimming is kept.
+        """
+        gen_output = result.gen_output[:MAX_FEEDBACK_BYTES + 1] if isinstance(result.gen_output, bytes) else None
+        self.queue.put(FeedbackRecord(file, result.test, gen_output, result.skip_reason))
+
+    def line(self, file: str, line: str):
+        """
+        Queue a single line to append to a log file.
+        """
+        self.queue.put(LineRecord(file, line))
+
+    def close(self):
+        """
+        Flush everything queued so far and stop the writer thread.
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+    @staticmethod
+    def trim_bytes(data: bytes, max_bytes: int = MAX_FEEDBACK_BYTES) -> bytes:
+        trimmed = data[:max_bytes]
+        if len(data) > max_bytes:
+            trimmed += b"\n... (output trimmed to %d bytes)" % max_bytes
+        return trimmed
+
+    def render(self, record: FeedbackRecord) -> str:
+        """
+        Give full feedback to a defender for a test they failed.
+        """
+        test = record.test
+        if test.path not in self.rendered:
+            self.rendered[test.path] = test.pretty_print(self.term_width)
+        exp_out = self.trim_bytes(x) if isinstance(x := test.expected_out, bytes) else ""
+        gen_out = self.trim_bytes(record.gen_output) if record.gen_output is not None else ""
+        reason = f"\nReason: {record.skip_reason}" if record.skip_reason else ""
+        return (
+          "="*80+'\n'
+          f"Test: {test.file}{reason}"
+          f"\nTest Contents:\n{self.rendered[test.path]}\n"
+          f"\nExpected Output: {exp_out}\n"
+          f"Generated Output: {gen_out}\n"
+        )
+
+    def _drain(self):
+        """
+        Take everything currently queued, group it by file and write each file once.
+        """
+        done = False
+        while not done:
+            records = [self.queue.get()]
+            while True:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batches: Dict[str, List[str]] = {}
+            for record in records:
+                if record is None:
+                    done = True
+                elif isinstance(record, LineRecord):
+                    batches.setdefault(record.file, []).append(record.line)
+                else:
+                    batches.setdefault(record.file, []).append(self.render(record))
+
+            for file, chunks in batches.items():
+                try:
+                    with open(file, 'a+') as f:
+                        f.write(''.join(chunks))
+                except Exception as e:
+                    log(f"Failed to write feedback to {file}: {e}")
@@ -1,13 +1,51 @@
+import os
 import csv
+import copy
+import signal
+import random
+import statistics
 import fnmatch
-from colorama                   import Fore
-from typing                     import Any, List, Dict, Optional, Set
-from dragon_runner.src.cli      import RunnerArgs
-from dragon_runner.src.config   import Config, Executable, Package
-from dragon_runner.src.log      import log
-from dragon_runner.src.runner   import TestResult, ToolChainRunner
-from dragon_runner.src.utils    import file_to_str
-from itertools                  import zip_longest
+import tempfile
+import threading
+import subprocess
+from colorama                       import Fore
+from typing                         import Any, List, Dict, Optional, Set, Tuple
+from dragon_runner.src.cli          import RunnerArgs
+from dragon_runner.src.cache        import LeakCache, ResultCache, result_key
+from dragon_runner.src.history      import DEFAULT_HISTORY_FILE, TestHistory
+from dragon_runner.src.health       import CircuitBreaker, smoke_probe
+from dragon_runner.src.feedback     import FeedbackWriter
+from dragon_runner.src.pool         import WorkerPool
+from dragon_runner.src.checkpoint   import CheckpointStore
+from dragon_runner.src.matrix       import ResultMatrix
+from dragon_runner.src.stats        import mean_ci_halfwidth, wilson_interval
+from dragon_runner.src.perf         import PerfRecord, record_key, write_long, write_wide
+from dragon_runner.src.scaling      import ScalingCurve, ScalingSpec, write_scaling
+from dragon_runner.src.affinity     import affinity_supported, make_allocator, pin_harness
+from dragon_runner.src.config       import Config, Executable, Package, SubPackage
+from dragon_runner.src.testfile     import TestFile
+from dragon_runner.src.toolchain    import ToolChain
+from dragon_runner.src.log          import log
+from dragon_runner.src.runner       import TestResult, ToolChainRunner
+from dragon_runner.src.utils        import file_to_str
+from collections                    import Counter
+
+# Attacking tests the solution fails when running with --validate
+REJECTED_TESTS_FILE = "rejected_tests.txt"
+
+def log_leak_summary(leak_tests: List[TestResult]):
+    """
+    List the tests which leaked, with their leaked bytes when a sanitizer reported them.
+    """
+    log(f"Leak Summary: ({len(leak_tests)} tests)")
+    for result in leak_tests:
+        detail = ""
+        if result.leaked_bytes is not None:
+            detail = f" ({result.leaked_bytes} bytes in {result.leak_allocations} allocations)"
+        log(Fore.YELLOW + "[LEAK] " + Fore.RESET + f"{result.test.file}{detail}", indent=4)
+
+class TournamentInterrupted(Exception):
+    pass
 
 class TestHarness:
     __test__ = False
@@ -17,6 +55,31 @@ class TestHarness:
         self.cli_args: RunnerArgs = cli_args
         self.failures: List[TestResult] = []
         self.run_passed = True
+        self.cache: Optional[ResultCache] = None
+        if cli_args.incremental:
+            self.cache = ResultCache(cli_args.cache_file)
+        self.history: Optional[TestHistory] = None
+        if cli_args.history_file:
+            self.history = TestHistory(cli_args.history_file)
+        elif cli_args.failed_first or cli_args.longest_first:
+            self.history = TestHistory(DEFAULT_HISTORY_FILE)
+        self.probe_failures: Dict[str, Optional[str]] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.shared_results: Optional[Dict[str, TestResult]] = None
+        if cli_args.dedup:
+            self.shared_results = {}
+            self.find_duplicates()
+
+    def find_duplicates(self):
+        """
+        Find executables and tests whose contents appear more than once in the config.
+        Only their results are worth remembering to share with identical copies.
+        """
+        def duplicated(digests) -> Set[str]:
+            return {d for d, n in Counter(digests).items() if d and n > 1}
+        self.shared_exes = duplicated(exe.digest for exe in self.config.executables)
+        self.shared_tests = duplicated(test.digest for pkg in self.config.packages
+                                       for spkg in pkg.subpackages for test in spkg.tests)
     
     def process_test_result(self, test_result: TestResult, context: Dict[str, Any]):
         """
@@ -52,6 +115,79 @@ class TestHarness:
     def pre_run_hook(self):
         pass
 
+    def run_test(self, tc_runner: ToolChainRunner, test: TestFile, exe: Executable) -> TestResult:
+        """
+        Run a single test, answering from the result cache when running incrementally.
+        Executables which cannot start are failed without running the test.
+        """
+        skip_reason = self.startup_failure(tc_runner.tc, exe)
+        if skip_reason:
+            test_result = TestResult(test=test, did_pass=False)
+            test_result.skip_reason = skip_reason
+            return test_result
+
+        # identical (binary, runtime, toolchain, test) combinations are only run once
+        shared_key = None
+        if self.shared_results is not None and \
+           (exe.digest in self.shared_exes or test.digest in self.shared_tests):
+            shared_key = result_key(tc_runner.tc, test, exe, tc_runner.timeout)
+            if shared_key in self.shared_results:
+                test_result = copy.copy(self.shared_results[shared_key])
+                test_result.test = test
+                return test_result
+
+        if self.cache is None:
+            test_result = tc_runner.run(test, exe)
+        else:
+            key = self.cache.key(tc_runner.tc, test, exe, tc_runner.timeout)
+            test_result = self.cache.get(key, test)
+            if test_result is None:
+                test_result = tc_runner.run(test, exe)
+                self.cache.put(key, test_result)
+
+        if shared_key:
+            self.shared_results[shared_key] = test_result
+        if self.history:
+            self.history.record(exe, tc_runner.tc, test_result)
+        self.breakers[f"{exe.id}:{tc_runner.tc.name}"].record(test_result)
+        return test_result
+
+    def startup_failure(self, tc: ToolChain, exe: Executable) -> Optional[str]:
+        """
+        Smoke probe each executable once and consult the circuit breaker for its
+        toolchain. Returns the reason the executable's tests should be failed, if any.
+        """
+        if self.cli_args.probe and exe.id not in self.probe_failures:
+            self.probe_failures[exe.id] = smoke_probe(exe, min(self.cli_args.timeout, 2.0))
+            if self.probe_failures[exe.id]:
+                log(Fore.RED + f"Smoke probe failed for {exe.id}: {self.probe_failures[exe.id]}" + Fore.RESET)
+        if self.probe_failures.get(exe.id):
+            return f"smoke probe failed: {self.probe_failures[exe.id]}"
+
+        breaker = self.breakers.setdefault(f"{exe.id}:{tc.name}", CircuitBreaker(self.cli_args.breaker))
+        if breaker.tripped:
+            return f"circuit breaker tripped: {breaker.reason}"
+        return None
+
+    def order_tests(self, tests: List[TestFile], exe: Executable, tc: ToolChain) -> List[TestFile]:
+        """
+        Order tests by their history if --failed-first or --longest-first was requested.
+        """
+        if self.history is None:
+            return tests
+        return self.history.order(tests, exe, tc,
+                                  failed_first=self.cli_args.failed_first,
+                                  longest_first=self.cli_args.longest_first)
+
+    def package_tests(self) -> List[TestFile]:
+        """
+        All tests of the subpackages selected by the package filter.
+        """
+        return [test for pkg in self.config.packages for spkg in pkg.subpackages
+                if not self.config.package_filter or
+                   fnmatch.fnmatch(spkg.path.lower(), self.config.package_filter.lower())
+                for test in spkg.tests]
+
     def iterate(self):
         """
         Basic structure to record which tests pass and fail. Additional functionality
@@ -81,10 +217,11 @@ class TestHarness:
                         log(f"Entering subpackage {spkg.name}", indent=3)
                         counters = {"pass_count": 0, "test_count": 0}
                         self.pre_subpackage_hook(spkg)
-                        for test in spkg.tests:
-                            test_result: TestResult = tc_runner.run(test, exe)
+                        for test in self.order_tests(spkg.tests, exe, toolchain):
+                            test_result: TestResult = self.run_test(tc_runner, test, exe)
                             self.process_test_result(test_result, counters)
                             if self.cli_args.fast_fail and not test_result.did_pass:
+                                tc_runner.close()
                                 self.post_subpackage_hook(counters)
                                 self.post_executable_hook()
                                 self.post_run_hook()
@@ -96,6 +233,7 @@ class TestHarness:
                     log("Packaged Passed: ", pkg_pass_count, "/", pkg_test_count, indent=2)
                     tc_pass_count += pkg_pass_count
                     tc_test_count += pkg_test_count
+                tc_runner.close()
                 log("Toolchain Passed: ", tc_pass_count, "/", tc_test_count, indent=1)
                 exe_pass_count += tc_pass_count
                 exe_test_count += tc_test_count
@@ -105,7 +243,13 @@ class TestHarness:
 
     def run(self):
         """Default run implementation."""
-        self.iterate()
+        try:
+            self.iterate()
+        finally:
+            if self.cache:
+                self.cache.save()
+            if self.history:
+                self.history.save()
         return self.run_passed
 
 class RegularHarness(TestHarness):
@@ -132,47 +276,215 @@ class TournamentHarness(TestHarness):
         """
         attacking_pkgs = sorted(self.config.packages, key=lambda pkg: pkg.name.lower())
         defending_exes = sorted(self.config.executables, key=lambda exe: exe.id.lower())
-        solution_exe = self.config.solution_exe
-        failure_log = self.cli_args.failure_log
+        self.feedback_writer = FeedbackWriter()
+        self.checkpoint = CheckpointStore(self.cli_args.checkpoint_file,
+                                          resume=self.cli_args.resume or bool(self.cli_args.recompute),
+                                          recompute=self.cli_args.recompute)
+        self.interrupted = False
+        in_main_thread = threading.current_thread() is threading.main_thread()
+        if in_main_thread:
+            prev_handler = signal.signal(signal.SIGINT, self.handle_sigint)
+        if self.cli_args.validate:
+            open(REJECTED_TESTS_FILE, 'w').close()
+        try:
+            for toolchain in self.config.toolchains:
+                validated = self.validate_tests(toolchain, attacking_pkgs) if self.cli_args.validate else None
+                self.run_toolchain(toolchain, defending_exes, attacking_pkgs, validated)
+        except TournamentInterrupted:
+            self.run_passed = False
+            print(Fore.YELLOW + f"\nTournament interrupted. Completed verdicts are saved in "
+                  f"{self.checkpoint.path}, rerun with --resume to continue." + Fore.RESET)
+        finally:
+            if in_main_thread:
+                signal.signal(signal.SIGINT, prev_handler)
+            self.checkpoint.close()
+            self.feedback_writer.close()
 
-        for toolchain in self.config.toolchains:
-            tc_runner = ToolChainRunner(toolchain, self.cli_args.timeout)
-            tc_table = self.create_tc_dataframe(defending_exes, attacking_pkgs)
+    def handle_sigint(self, signum, frame):
+        """
+        Let the running test finish so its verdict is not confused with the interrupt,
+        then stop cleanly. A second interrupt aborts immediately.
+        """
+        if self.interrupted:
+            raise KeyboardInterrupt
+        self.interrupted = True
+        print(Fore.YELLOW + "\nInterrupt received, saving results. Press Ctrl-C again to abort." + Fore.RESET)
+
+    @staticmethod
+    def describe_failure(result: TestResult) -> str:
+        if result.skip_reason:
+            return result.skip_reason
+        if result.did_timeout:
+            return f"timed out in step {result.failing_step}"
+        if result.failing_step:
+            return f"failed in step {result.failing_step}"
+        return "output mismatch"
+
+    def validate_tests(self, toolchain: ToolChain,
+                       attacking_pkgs: List[Package]) -> Optional[Dict[str, TestResult]]:
+        """
+        Run every attacking test once on the solution executable in parallel. Tests the
+        solution fails are written to the rejected tests report and excluded from the
+        tournament. Returns the solution's results for the accepted tests.
+        """
+        solution = next((exe for exe in self.config.executables if exe.id == self.config.solution_exe), None)
+        if solution is None:
+            log(Fore.YELLOW + "Skipping test validation: no solutionExecutable in config" + Fore.RESET)
+            return None
+
+        print(f"\nValidating attacking tests for {toolchain.name} on {solution.id}")
+        tests = [(pkg, test) for pkg in attacking_pkgs for spkg in pkg.subpackages for test in spkg.tests]
+        solution.source_env()
+        pool = WorkerPool(toolchain, self.cli_args.timeout, self.cli_args.jobs)
+        try:
+            results = list(pool.map(lambda runner, test: self.run_test(runner, test, solution),
+                                    [test for _, test in tests]))
+        finally:
+            pool.close()
 
-            with open(f"toolchain_{toolchain.name}.csv", 'w') as toolchain_csv:
-                print(f"\nToolchain: {toolchain.name}")
-                csv_writer = csv.writer(toolchain_csv)
-                csv_writer.writerow([toolchain.name] + [pkg.name for pkg in attacking_pkgs])
+        accepted: Dict[str, TestResult] = {}
+        for (pkg, test), result in zip(tests, results):
+            if result.did_pass:
+                accepted[test.path] = result
+            else:
+                reason = self.describe_failure(result)
+                log(Fore.RED + "[REJECTED] " + Fore.RESET + f"{pkg.name} {test.file} ({reason})", indent=2)
+                self.feedback_writer.line(REJECTED_TESTS_FILE, f"{toolchain.name} {pkg.name} {test.path} {reason}\n")
+        print(f"  Accepted {len(accepted)}/{len(tests)} tests")
+        return accepted
+
+    def run_toolchain(self, toolchain: ToolChain, defending_exes: List[Executable],
+                      attacking_pkgs: List[Package], validated: Optional[Dict[str, TestResult]]=None):
+        """
+        Run every attacking package against every defender for one toolchain. When tests
+        were validated, only accepted tests are run and the solution reuses its results.
+        Per-test verdicts are saved alongside the CSV in toolchain_<name>.npz and
+        per-cell times in timing_<name>.csv.
+        """
+        tc_runner = ToolChainRunner(toolchain, self.cli_args.timeout)
+        tc_table = self.create_tc_dataframe(defending_exes, attacking_pkgs)
+        timing_table = self.create_timing_dataframe(defending_exes, attacking_pkgs)
+        self.matrix = ResultMatrix.from_packages(toolchain.name, defending_exes, attacking_pkgs)
+
+        with open(f"toolchain_{toolchain.name}.csv", 'w') as toolchain_csv, \
+             open(f"timing_{toolchain.name}.csv", 'w') as timing_csv:
+            print(f"\nToolchain: {toolchain.name}")
+            csv_writer = csv.writer(toolchain_csv)
+            timing_writer = csv.writer(timing_csv)
+            csv_writer.writerow([toolchain.name] + [pkg.name for pkg in attacking_pkgs])
+            timing_writer.writerow([toolchain.name] + [pkg.name for pkg in attacking_pkgs])
+            toolchain_csv.flush()
+
+            for def_exe in defending_exes:
+                def_exe.source_env()
+                for a_pkg in attacking_pkgs:
+                    print(f"\n  {a_pkg.name:<12} --> {def_exe.id:<12}", end='') 
+                    cell, results = self.run_cell(toolchain, tc_runner, def_exe, a_pkg, validated)
+                    tc_table[def_exe.id][a_pkg.name] = cell
+                    timing_table[def_exe.id][a_pkg.name] = self.format_timing(results)
+                tc_runner.close()
+                csv_writer.writerow([def_exe.id] + [tc_table[def_exe.id][pkg.name] for pkg in attacking_pkgs])
+                timing_writer.writerow([def_exe.id] + [timing_table[def_exe.id][pkg.name] for pkg in attacking_pkgs])
                 toolchain_csv.flush()
+                timing_csv.flush()
+                self.checkpoint.sync()
+        self.matrix.save(f"toolchain_{toolchain.name}.npz")
+
+    def cell_tests(self, toolchain: ToolChain, def_exe: Executable, a_pkg: Package,
+                   validated: Optional[Dict[str, TestResult]]) -> List[Tuple[SubPackage, TestFile]]:
+        """
+        List the tests of an attacking package to run against a defender. When sampling,
+        each subpackage is shuffled and the j-th test of a subpackage of n tests is
+        placed at (j + 0.5) / n, so any prefix of the list draws from every subpackage
+        in proportion to its size. The sample is then self-weighting and its plain pass
+        rate estimates the package's. The shuffle only depends on the seed and the
+        attacker, so every defender is sampled in the same order.
+        """
+        strata = []
+        for a_spkg in a_pkg.subpackages:
+            tests = [test for test in self.order_tests(a_spkg.tests, def_exe, toolchain)
+                     if validated is None or test.path in validated]
+            if self.cli_args.sample:
+                rng = random.Random(f"{self.cli_args.seed}:{toolchain.name}:{a_pkg.name}:{a_spkg.name}")
+                rng.shuffle(tests)
+            strata.append([(a_spkg, test) for test in tests])
+        if not self.cli_args.sample:
+            return [item for stratum in strata for item in stratum]
+        draws = [((j + 0.5) / len(stratum), index, item)
+                 for index, stratum in enumerate(strata) for j, item in enumerate(stratum)]
+        return [item for _, _, item in sorted(draws, key=lambda draw: draw[:2])]
 
-                for def_exe in defending_exes:
-                    def_exe.source_env()
-                    def_feedback_file = f"{def_exe.id}-{toolchain.name}feedback.txt"
-                    for a_pkg in attacking_pkgs:
-                        print(f"\n  {a_pkg.name:<12} --> {def_exe.id:<12}", end='') 
-                        pass_count = 0
-                        test_count = 0
-                        for a_spkg in a_pkg.subpackages:
-                            for test in a_spkg.tests:
-                                test_result: Optional[TestResult] = tc_runner.run(test, def_exe)
-                                if test_result and test_result.did_pass:
-                                    print(Fore.GREEN + '.' + Fore.RESET, end='')
-                                    pass_count += 1
-                                    if solution_exe == def_exe.id and failure_log:
-                                        with open("pass_log.txt", 'a') as f_log:
-                                            f_log.write(f"{toolchain.name} {a_pkg.name} {test_result.test.path}\n")
-                                else:
-                                    print(Fore.RED + '.' + Fore.RESET, end='')
-                                    self.log_failure_to_file(def_feedback_file, test_result)
-                                    if solution_exe == def_exe.id and failure_log:
-                                        with open(failure_log, 'a') as f_log:
-                                            f_log.write(f"{toolchain.name} {a_pkg.name} {test_result.test.path}\n")
-                                test_count += 1
-
-                        cell_value = f"{pass_count}/{test_count}"
-                        tc_table[def_exe.id][a_pkg.name] = cell_value
-                    csv_writer.writerow([def_exe.id] + [tc_table[def_exe.id][pkg.name] for pkg in attacking_pkgs])
-                    toolchain_csv.flush()
+    def sample_converged(self, pass_count: int, test_count: int, population: int) -> bool:
+        if not self.cli_args.sample or test_count < self.cli_args.min_samples:
+            return False
+        low, high = wilson_interval(pass_count, test_count, population)
+        return high - low <= self.cli_args.ci_width
+
+    @staticmethod
+    def format_cell(pass_count: int, test_count: int, population: int) -> str:
+        """
+        Exhaustive cells are written as pass/total, sampled cells as an estimated pass
+        rate followed by its 95% interval.
+        """
+        if test_count == population:
+            return f"{pass_count}/{test_count}"
+        low, high = wilson_interval(pass_count, test_count, population)
+        return f"{pass_count / test_count:.3f} [{low:.3f}, {high:.3f}]"
+
+    def run_cell(self, toolchain: ToolChain, tc_runner: ToolChainRunner, def_exe: Executable,
+                 a_pkg: Package, validated: Optional[Dict[str, TestResult]]) -> Tuple[str, List[TestResult]]:
+        """
+        Run an attacking package's tests against a defender and return the table cell
+        along with the results of the tests that were run. Verdicts already in the
+        checkpoint are counted without rerunning. When sampling, the cell stops once
+        its confidence interval is narrow enough.
+        """
+        solution_exe = self.config.solution_exe
+        failure_log = self.cli_args.failure_log
+        def_feedback_file = f"{def_exe.id}-{toolchain.name}feedback.txt"
+        tests = self.cell_tests(toolchain, def_exe, a_pkg, validated)
+        results: List[TestResult] = []
+        pass_count = 0
+        test_count = 0
+        for a_spkg, test in tests:
+            if self.sample_converged(pass_count, test_count, len(tests)):
+                break
+            test_key = ResultMatrix.test_key(a_pkg, a_spkg, test)
+            hashes = (toolchain.digest, def_exe.digest, test.digest)
+            recorded = self.checkpoint.get(toolchain.name, def_exe.id, a_pkg.name, test_key, hashes)
+            if recorded is not None:
+                print(Fore.CYAN + '.' + Fore.RESET, end='')
+                self.matrix.record(def_exe.id, a_pkg.name, test_key, recorded)
+                pass_count += int(recorded)
+                test_count += 1
+                continue
+            
+            if self.interrupted:
+                raise TournamentInterrupted()
+            if validated is not None and def_exe.id == solution_exe:
+                test_result: TestResult = validated[test.path]
+            else:
+                test_result = self.run_test(tc_runner, test, def_exe)
+            if self.interrupted:
+                # the interrupt also reaches the test's processes, so discard its verdict
+                raise TournamentInterrupted()
+
+            self.checkpoint.record(toolchain.name, def_exe.id, a_pkg.name, test_key, hashes, test_result.did_pass)
+            self.matrix.record(def_exe.id, a_pkg.name, test_key, test_result.did_pass)
+            results.append(test_result)
+            log_line = f"{toolchain.name} {a_pkg.name} {test_result.test.path}\n"
+            if test_result.did_pass:
+                print(Fore.GREEN + '.' + Fore.RESET, end='')
+                pass_count += 1
+                if solution_exe == def_exe.id and failure_log:
+                    self.feedback_writer.line("pass_log.txt", log_line)
+            else:
+                print(Fore.RED + '.' + Fore.RESET, end='')
+                self.log_failure_to_file(def_feedback_file, test_result)
+                if solution_exe == def_exe.id and failure_log:
+                    self.feedback_writer.line(failure_log, log_line)
+            test_count += 1
+        return self.format_cell(pass_count, test_count, len(tests)), results
 
     @staticmethod
     def create_tc_dataframe(defenders: List[Executable],
@@ -184,38 +496,35 @@ class TournamentHarness(TestHarness):
         return df
 
     @staticmethod
-    def create_timing_dataframe() -> Dict[str, Dict[str, float]]:
+    def create_timing_dataframe(defenders: List[Executable],
+                                attackers: List[Package]) -> Dict[str, Dict[str, str]]:
         """
-        TODO: Creating timing DF for Gazprea II (Only applicable for grading)
+        Create an empty timing table with the same labels as the toolchain table
         """
-        return {}
+        return {exe.id: {pkg.name: '' for pkg in attackers} for exe in defenders}
+
+    @staticmethod
+    def format_timing(results: List[TestResult]) -> str:
+        """
+        Summarize a cell as the total time of every step over its tests, followed by
+        the median time of the final (run) step. Verdicts reused from the checkpoint
+        carry no timings, so only tests run in this invocation are counted.
+        """
+        if not results:
+            return ''
+        total = sum(cr.time for result in results for cr in result.command_history)
+        run_times = [result.time for result in results if result.time is not None]
+        median = statistics.median(run_times) if run_times else 0.0
+        return f"{total:.4f} ({median:.4f})"
 
     def log_failure_to_file(self, file, result: TestResult):
         """
-        Give full feedback to a defender for all the tests they failed.
+        Give full feedback to a defender for all the tests they failed. Rendering
+        and writing happen on the feedback writer's thread.
         """
-        def trim_bytes(data: bytes, max_bytes: int = 10000) -> bytes:
-            trimmed = data[:max_bytes]
-            if len(data) > max_bytes:
-                trimmed += b"\n... (output trimmed to %d bytes)" % max_bytes
-            return trimmed
-        
         if result.did_pass:
             return
-
-        with open(file, 'a+') as feedback_file:
-            test_contents = result.test.pretty_print()
-            exp_out = trim_bytes(x) if isinstance(x := result.test.expected_out, bytes) else ""
-            gen_out = trim_bytes(x) if isinstance(x := result.gen_output, bytes) else ""
-            feedback_string = (
-              "="*80+'\n'
-              f"Test: {result.test.file}"
-              f"\nTest Contents:\n{test_contents}\n"
-              f"\nExpected Output: {exp_out}\n"
-              f"Generated Output: {gen_out}\n"
-            )
-
-            feedback_file.write(feedback_string)
+        self.feedback_writer.feedback(file, result)
 
 class MemoryCheckHarness(TestHarness):
     
@@ -224,15 +533,57 @@ class MemoryCheckHarness(TestHarness):
         self.leak_count = 0
         self.test_count = 0
         self.leak_tests: List[TestResult] = []
+        self.leak_cache: Optional[LeakCache] = None
+        if cli_args.leak_cache:
+            self.leak_cache = LeakCache(cli_args.leak_cache)
+
+    def run_test(self, tc_runner: ToolChainRunner, test: TestFile, exe: Executable) -> TestResult:
+        tc_runner.leak_cache = self.leak_cache
+        return super().run_test(tc_runner, test, exe)
+
+    def iterate(self):
+        if self.cli_args.jobs > 1:
+            self.iterate_parallel()
+        else:
+            super().iterate()
+
+    def iterate_parallel(self):
+        """
+        Run the tests of each executable on a worker pool, since every test is slowed
+        down many times over under the leak checker. With --longest-first the slowest
+        tests are handed out first so the pool does not finish on a straggler.
+        """
+        self.pre_run_hook()
+        for exe in self.config.executables:
+            self.pre_executable_hook(exe.id)
+            log(f"Running executable: {exe.id}", indent=0)
+            exe.source_env()
+            counters = {"pass_count": 0, "test_count": 0}
+            for toolchain in self.config.toolchains:
+                log(f"Running Toolchain: {toolchain.name}", indent=1)
+                pool = WorkerPool(toolchain, self.cli_args.timeout, self.cli_args.jobs)
+                try:
+                    tests = self.order_tests(self.package_tests(), exe, toolchain)
+                    for test_result in pool.map(lambda runner, test: self.run_test(runner, test, exe), tests):
+                        self.process_test_result(test_result, counters)
+                finally:
+                    pool.close()
+            log("Executable Passed: ", counters["pass_count"], "/", counters["test_count"])
+            self.post_executable_hook()
+        self.post_run_hook()
+
+    def run(self):
+        try:
+            return super().run()
+        finally:
+            if self.leak_cache:
+                self.leak_cache.save()
     
     def post_executable_hook(self):
         """
         Report failures to stdout.
         """
-        log(f"Leak Summary: ({len(self.leak_tests)} tests)") 
-        for result in self.leak_tests:
-            log(Fore.YELLOW + "[LEAK] " + Fore.RESET + f"{result.test.file}",
-                indent=4)
+        log_leak_summary(self.leak_tests)
         self.leak_tests = []
         self.test_count = 0 # reset for each executable
 
@@ -257,14 +608,51 @@ class MemoryCheckHarness(TestHarness):
         if test_result.did_pass:
             context["pass_count"] += 1 
        
+class CombinedHarness(RegularHarness):
+    """
+    Check every test's output with a native run, then run the final step of the
+    tests which passed again under the config's leakChecker, reusing the artifact
+    the toolchain just built. Failing tests, and error tests which passed without
+    running the whole toolchain, are never leak checked.
+    """
+    def __init__(self, config: Config, cli_args: RunnerArgs):
+        super().__init__(config, cli_args)
+        self.cache = None # cached verdicts have no artifact to leak check
+        self.leak_tests: List[TestResult] = []
+
+    def run_test(self, tc_runner: ToolChainRunner, test: TestFile, exe: Executable) -> TestResult:
+        test_result = super().run_test(tc_runner, test, exe)
+        # results shared between identical executables are checked once
+        if test_result.did_pass and test_result.leak_status is None:
+            tc_runner.run_leak_check(test_result, self.config.leak_checker)
+        return test_result
+
+    def process_test_result(self, test_result: TestResult, context: Dict[str, Any]):
+        super().process_test_result(test_result, context)
+        if test_result.memory_leak:
+            self.leak_tests.append(test_result)
+
+    def post_executable_hook(self):
+        """
+        Report the passing tests which leak.
+        """
+        log_leak_summary(self.leak_tests)
+        self.leak_tests = []
+        super().post_executable_hook()
+
 class PerformanceTestingHarness(TestHarness):
     
     def __init__(self, config: Config, cli_args: RunnerArgs):
         super().__init__(config, cli_args)
-        self.csv_cols = []
-        self.cur_col = []
-        self.testfile_col = ["Test"]
-        self.first_exec = True
+        self.cache = None # cached verdicts carry no fresh timings
+        self.shared_results = None # every executable must be timed itself
+        self.records: Dict[Tuple[str, str, str], PerfRecord] = {}
+        self.rows: List[Tuple[str, str, str]] = []
+        self.calibration: Optional[float] = None
+        # trial CPUs are checked against the affinity from before the harness is pinned
+        self.allocator = make_allocator(cli_args.pin_cpus, cli_args.cpus_per_trial, cli_args.trials_per_set)
+        if cli_args.harness_cpus:
+            pin_harness(cli_args.harness_cpus)
 
     @staticmethod
     def create_tc_dataframe(defenders: List[Executable],
@@ -274,42 +662,311 @@ class PerformanceTestingHarness(TestHarness):
         """ 
         df = {exe.id: {pkg.name for pkg in attackers} for exe in defenders}
         return df
-    
+
+    def order_tests(self, tests: List[TestFile], exe: Executable, tc: ToolChain) -> List[TestFile]:
+        """
+        Every executable must see tests in the same order to keep perf.csv rows aligned.
+        """
+        return tests
+
+    def needs_trial(self, record: PerfRecord) -> bool:
+        """
+        Run at least --trials measured trials, then keep going up to --max-trials
+        until the mean's 95% confidence interval is within --rel-ci of the mean.
+        """
+        n = len(record.samples)
+        if not record.passed or n >= max(self.cli_args.trials, self.cli_args.max_trials):
+            return False
+        if n < self.cli_args.trials:
+            return True
+        mean = statistics.mean(record.samples)
+        return mean > 0 and mean_ci_halfwidth(record.samples) > self.cli_args.rel_ci * mean
+
+    def test_key(self, test: TestFile) -> str:
+        return record_key(test, self.config.test_dir)
+
+    def add_row(self, tc: ToolChain, test: TestFile):
+        row = (tc.name, self.test_key(test), test.file)
+        if row not in self.rows:
+            self.rows.append(row)
+
+    def start_record(self, exe: Executable, tc: ToolChain, test: TestFile,
+                     seed: Optional[int]=None) -> PerfRecord:
+        self.add_row(tc, test)
+        record = PerfRecord(exe.id, tc, self.test_key(test), seed, self.calibration)
+        self.records[(exe.id, tc.name, record.test)] = record
+        return record
+
+    def pre_run_hook(self):
+        if self.cli_args.calibrate:
+            self.calibration = self.calibrate()
+
+    def calibrate(self) -> Optional[float]:
+        """
+        Time the solution executable on a reference workload, the tests in
+        --calibration-dir (or the config's tests) under the first toolchain. The
+        calibration is the median total score of the tests over --trials passes, which
+        grade-perf uses to put results from different machines on one scale. A failing
+        reference test leaves the run uncalibrated and failed.
+        """
+        solution = next((exe for exe in self.config.executables if exe.id == self.config.solution_exe), None)
+        if solution is None:
+            log(Fore.RED + "Calibration needs a solutionExecutable in the config" + Fore.RESET)
+            self.run_passed = False
+            return None
+        packages = [Package(self.cli_args.calibration_dir)] if self.cli_args.calibration_dir else self.config.packages
+        tests = [test for pkg in packages for spkg in pkg.subpackages for test in spkg.tests]
+        toolchain = self.config.toolchains[0]
+        tc_runner = ToolChainRunner(toolchain, self.cli_args.timeout)
+        solution.source_env()
+        totals, failed = [], set()
+        try:
+            for _ in range(max(self.cli_args.trials, 1)):
+                total = 0.0
+                for test in tests:
+                    record = PerfRecord(solution.id, toolchain, test.file)
+                    record.add(*self.run_pinned(tc_runner, test, solution))
+                    if not record.passed:
+                        failed.add(test.path)
+                    total += sum(record.samples)
+                totals.append(total)
+        finally:
+            tc_runner.close()
+        if failed:
+            log(Fore.RED + f"Calibration failed: {solution.id} did not pass {len(failed)} "
+                f"of {len(tests)} reference tests" + Fore.RESET)
+            self.run_passed = False
+            return None
+        calibration = statistics.median(totals)
+        log(f"Calibrated with {solution.id} on {len(tests)} tests: {calibration:.4f}s")
+        return calibration
+
+    def run_test(self, tc_runner: ToolChainRunner, test: TestFile, exe: Executable) -> TestResult:
+        """
+        Run the warmups, whose times are discarded, then the measured trials of a test.
+        The last trial's result is reported.
+        """
+        for _ in range(self.cli_args.warmup):
+            if not self.run_pinned(tc_runner, test, exe)[0].did_pass:
+                break
+
+        record = self.start_record(exe, tc_runner.tc, test)
+        self.trial(record, tc_runner, test, exe)
+        while self.needs_trial(record):
+            self.trial(record, tc_runner, test, exe)
+        return record.last_result
+
+    def run_pinned(self, tc_runner: ToolChainRunner, test: TestFile,
+                   exe: Executable) -> Tuple[TestResult, Optional[Set[int]]]:
+        """
+        Run a test pinned to a free CPU set when --pin-cpus was given. Also returns the
+        CPUs its steps were allowed to run on.
+        """
+        if self.allocator is None:
+            cpus = os.sched_getaffinity(0) if affinity_supported() else None
+            return super().run_test(tc_runner, test, exe), cpus
+        with self.allocator.acquire() as cpus:
+            tc_runner.cpus = cpus
+            try:
+                return super().run_test(tc_runner, test, exe), set(cpus)
+            finally:
+                tc_runner.cpus = None
+
+    def trial(self, record: PerfRecord, tc_runner: ToolChainRunner, test: TestFile, exe: Executable):
+        record.add(*self.run_pinned(tc_runner, test, exe))
+
+    def iterate(self):
+        if self.cli_args.interleave:
+            self.iterate_interleaved()
+        elif self.cli_args.jobs > 1:
+            self.iterate_parallel()
+        else:
+            super().iterate()
+
+    def iterate_parallel(self):
+        """
+        Measure several tests of an executable at once on a worker pool. Combine with
+        --pin-cpus so that concurrent trials never share CPUs with each other. The rows
+        are laid out before the pool starts, so the pool itself may take tests in their
+        history order.
+        """
+        self.pre_run_hook()
+        for exe in self.config.executables:
+            log(f"Running executable: {exe.id}", indent=0)
+            exe.source_env()
+            counters = {"pass_count": 0, "test_count": 0}
+            for toolchain in self.config.toolchains:
+                log(f"Running Toolchain: {toolchain.name}", indent=1)
+                tests = self.package_tests()
+                for test in tests:
+                    self.add_row(toolchain, test)
+                tests = TestHarness.order_tests(self, tests, exe, toolchain)
+                pool = WorkerPool(toolchain, self.cli_args.timeout, self.cli_args.jobs)
+                try:
+                    for test_result in pool.map(lambda runner, test: self.run_test(runner, test, exe), tests):
+                        self.process_test_result(test_result, counters)
+                finally:
+                    pool.close()
+            log("Executable Passed: ", counters["pass_count"], "/", counters["test_count"])
+        self.post_run_hook()
+
+    def iterate_interleaved(self):
+        """
+        Measure test by test, running each round of trials across every executable in
+        a freshly shuffled order, so drift over the run is spread across all of them
+        instead of favouring whichever executable goes first.
+        """
+        seed = self.cli_args.seed if self.cli_args.seed is not None else random.randrange(2**32)
+        log(f"Interleaving perf trials with seed {seed}")
+        self.pre_run_hook()
+        exes = self.config.executables
+        counters = {exe.id: {"pass_count": 0, "test_count": 0} for exe in exes}
+        for toolchain in self.config.toolchains:
+            log(f"Running Toolchain: {toolchain.name}", indent=1)
+            runners = {exe.id: ToolChainRunner(toolchain, self.cli_args.timeout) for exe in exes}
+            for pkg in self.config.packages:
+                for spkg in pkg.subpackages:
+                    if self.config.package_filter:
+                        if not fnmatch.fnmatch(spkg.path.lower(), self.config.package_filter.lower()):
+                            continue
+                    for test in spkg.tests:
+                        rng = random.Random(f"{seed}:{toolchain.name}:{spkg.name}:{test.file}")
+                        records = {exe.id: self.start_record(exe, toolchain, test, seed) for exe in exes}
+                        warmups = {exe.id: self.cli_args.warmup for exe in exes}
+                        results: Dict[str, TestResult] = {}
+                        pending = set(records)
+                        while pending:
+                            order = list(exes)
+                            rng.shuffle(order)
+                            for exe in order:
+                                if exe.id not in pending:
+                                    continue
+                                exe.source_env()
+                                if warmups[exe.id] > 0:
+                                    warmups[exe.id] -= 1
+                                    if self.run_pinned(runners[exe.id], test, exe)[0].did_pass:
+                                        continue
+                                    warmups[exe.id] = 0
+                                self.trial(records[exe.id], runners[exe.id], test, exe)
+                                results[exe.id] = records[exe.id].last_result
+                                if not self.needs_trial(records[exe.id]):
+                                    pending.discard(exe.id)
+                        for exe in exes:
+                            log(f"{exe.id}:", indent=2)
+                            self.process_test_result(results[exe.id], counters[exe.id])
+            for runner in runners.values():
+                runner.close()
+        for exe in exes:
+            log(f"Executable {exe.id} Passed: ", counters[exe.id]["pass_count"], "/", counters[exe.id]["test_count"])
+        self.post_run_hook()
+
     def process_test_result(self, test_result: TestResult, context: Dict[str, Any]):
         """
         Override the hook for regular run-specific implementation of counting passes
         """
-        # only construct a column for the test file names once 
-        if self.first_exec:
-            self.testfile_col.append(test_result.test.file)
-        
         if test_result.did_pass:
             context["pass_count"] += 1
-            test_result.log(args=self.cli_args)
-            self.cur_col.append(test_result.time)
-            
         else:
-            self.cur_col.append(self.cli_args.timeout)
             self.failures.append(test_result)
-            test_result.log(args=self.cli_args)
+        test_result.log(args=self.cli_args)
         context["test_count"] += 1
     
-    def pre_executable_hook(self, exe):
-        self.cur_col.append(exe)
+    def post_run_hook(self):
+        """
+        Write the median score of each cell to the wide perf.csv, its median peak RSS
+        to mem.csv, and every cell's trials and summary statistics to perf_long.csv.
+        """
+        exes = [exe.id for exe in self.config.executables]
+        write_wide('perf.csv', self.records, exes, self.rows, lambda r: r.wide_value(self.cli_args.timeout))
+        write_wide('mem.csv', self.records, exes, self.rows, lambda r: r.mem_value())
+        write_long('perf_long.csv', self.records)
 
-    def post_executable_hook(self): 
-        if self.first_exec:
-            self.csv_cols.append(self.testfile_col)
-            self.first_exec = False
-        
-        self.csv_cols.append(self.cur_col)
-        self.cur_col = []
-    
-    def post_run_hook(self):  
-        # transpose the columns into rows for writing
-        csv_rows = zip_longest(*self.csv_cols, fillvalue='')
-        
-        with open('perf.csv', 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerows(csv_rows)
+class ScalingHarness(PerformanceTestingHarness):
+    """
+    Run tests which declare SIZES and an input or source generator at each size, then
+    fit how each executable's score and steps grow with the size. Generated tests have
+    no expected output, so a run passes when every step of the toolchain completes.
+    Larger sizes are skipped once an executable fails or times out.
+    """
+    def __init__(self, config: Config, cli_args: RunnerArgs):
+        super().__init__(config, cli_args)
+        self.curves: List[ScalingCurve] = []
+        self.origins: Dict[str, str] = {}
+
+    def test_key(self, test: TestFile) -> str:
+        """
+        Generated sources are written to a temporary directory, so they are keyed as
+        if they sat next to the test they were generated from.
+        """
+        origin = self.origins.get(test.path)
+        if origin is None:
+            return super().test_key(test)
+        return os.path.relpath(os.path.join(os.path.dirname(origin), test.file), self.config.test_dir)
+
+    def run_pinned(self, tc_runner: ToolChainRunner, test: TestFile,
+                   exe: Executable) -> Tuple[TestResult, Optional[Set[int]]]:
+        result, cpus = super().run_pinned(tc_runner, test, exe)
+        if result.skip_reason is None:
+            result.did_pass = result.failing_step is None and result.gen_output is not None
+        return result, cpus
 
+    def iterate(self):
+        self.pre_run_hook()
+        exes = self.config.executables
+        counters = {exe.id: {"pass_count": 0, "test_count": 0} for exe in exes}
+        workdir = tempfile.TemporaryDirectory(prefix="dragon_scaling_")
+        try:
+            for toolchain in self.config.toolchains:
+                log(f"Running Toolchain: {toolchain.name}", indent=1)
+                runners = {exe.id: ToolChainRunner(toolchain, self.cli_args.timeout) for exe in exes}
+                for pkg in self.config.packages:
+                    for spkg in pkg.subpackages:
+                        if self.config.package_filter:
+                            if not fnmatch.fnmatch(spkg.path.lower(), self.config.package_filter.lower()):
+                                continue
+                        for test in spkg.tests:
+                            spec = ScalingSpec.from_test(test)
+                            if spec is not None:
+                                self.run_scaling_test(spec, toolchain, runners, counters,
+                                                      tempfile.mkdtemp(dir=workdir.name))
+                for runner in runners.values():
+                    runner.close()
+        finally:
+            workdir.cleanup()
+        for exe in exes:
+            log(f"Executable {exe.id} Passed: ", counters[exe.id]["pass_count"], "/", counters[exe.id]["test_count"])
+        self.post_run_hook()
+
+    def run_scaling_test(self, spec: ScalingSpec, toolchain: ToolChain,
+                         runners: Dict[str, ToolChainRunner],
+                         counters: Dict[str, Dict[str, int]], workdir: str):
+        """
+        Generate every size of a test once, then run the sizes in increasing order for
+        each executable.
+        """
+        log(f"Scaling {spec.test.file} over sizes {' '.join(map(str, spec.sizes))}", indent=2)
+        try:
+            variants = [spec.variant(size, workdir, self.cli_args.timeout) for size in spec.sizes]
+        except (OSError, subprocess.SubprocessError) as e:
+            log(Fore.RED + f"Failed to generate {spec.test.file}: {e}" + Fore.RESET, indent=3)
+            self.run_passed = False
+            return
+        self.origins.update((test.path, spec.test.path) for test in variants)
+        self.curves.append(ScalingCurve(toolchain.name, self.test_key(spec.test), [step.name for step in toolchain],
+                                        {size: self.test_key(test) for size, test in zip(spec.sizes, variants)}))
+        for exe in self.config.executables:
+            exe.source_env()
+            log(f"{exe.id}:", indent=2)
+            for test in variants:
+                test_result = self.run_test(runners[exe.id], test, exe)
+                self.process_test_result(test_result, counters[exe.id])
+                if not test_result.did_pass:
+                    break
+
+    def post_run_hook(self):
+        """
+        Write the perf results of every size, then the fitted curves to scaling.csv.
+        """
+        super().post_run_hook()
+        write_scaling('scaling.csv', self.curves, self.records,
+                      [exe.id for exe in self.config.executables], self.config.solution_exe)
@@ -0,0 +1,71 @@
+import os
+import subprocess
+from typing                         import Optional
+from dragon_runner.src.config       import Executable
+from dragon_runner.src.runner       import CommandResult, TestResult
+
+# Markers the dynamic loader prints when a shared library cannot be found
+LOADER_ERRORS = [b"error while loading shared libraries", b"Library not loaded", b"dyld: "]
+
+def startup_failure(cr: CommandResult) -> Optional[str]:
+    """
+    Describe why a command could not start, or return None if it started. Only exec
+    and dynamic loader failures count, since those fail identically on every test
+    while crashes and bad exit codes can be legitimate test outcomes.
+    """
+    if cr.timed_out:
+        return None
+    if cr.subprocess is None:
+        return f"could not execute {cr.cmd}"
+    if cr.exit_status in (126, 127):
+        return f"{cr.cmd} could not be executed (exit {cr.exit_status})"
+    stderr = cr.subprocess.stderr or b''
+    for marker in LOADER_ERRORS:
+        if marker in stderr:
+            line = next(l for l in stderr.splitlines() if marker in l)
+            return f"{cr.cmd} failed to load: {line.decode(errors='replace').strip()}"
+    return None
+
+def smoke_probe(exe: Executable, timeout: float=2.0) -> Optional[str]:
+    """
+    Run the executable once with no arguments and empty stdin to catch binaries which
+    are missing or cannot load their shared libraries before any tests are scheduled.
+    """
+    exe.source_env()
+    cr = CommandResult(cmd=exe.exe_path)
+    try:
+        cr.subprocess = subprocess.run([exe.exe_path], env=os.environ.copy(), input=b'',
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       check=False, timeout=timeout)
+        cr.exit_status = cr.subprocess.returncode
+    except subprocess.TimeoutExpired:
+        cr.timed_out = True
+    except Exception:
+        cr.exit_status = 1
+    return startup_failure(cr)
+
+class CircuitBreaker:
+    """
+    Trips after a number of consecutive tests fail to start in the same way, after
+    which the remaining tests are failed in bulk instead of being run one at a time.
+    """
+    def __init__(self, threshold: int):
+        self.threshold                      = threshold
+        self.last_failure: Optional[str]    = None
+        self.count                          = 0
+        self.reason: Optional[str]          = None
+
+    @property
+    def tripped(self) -> bool:
+        return self.reason is not None
+
+    def record(self, result: TestResult):
+        failure = next((f for cr in result.command_history if (f := startup_failure(cr))), None)
+        if failure is None:
+            self.last_failure = None
+            self.count = 0
+            return
+        self.count = self.count + 1 if failure == self.last_failure else 1
+        self.last_failure = failure
+        if self.threshold and self.count >= self.threshold:
+            self.reason = f"{failure} on {self.count} consecutive tests"
@@ -0,0 +1,60 @@
+from typing                         import Dict, List
+from dragon_runner.src.config       import Executable
+from dragon_runner.src.toolchain    import ToolChain
+from dragon_runner.src.testfile     import TestFile
+from dragon_runner.src.runner       import TestResult
+from dragon_runner.src.utils        import file_to_json, json_to_file
+
+# History kept by --failed-first and --longest-first when no --history-file is given
+DEFAULT_HISTORY_FILE = ".dragon-runner-history.json"
+
+class TestHistory:
+    """
+    Durations and last verdicts of each test from previous runs, used to schedule
+    recently failing tests or the slowest tests first.
+    """
+    __test__ = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = file_to_json(path) or {}
+
+    @staticmethod
+    def key(exe: Executable, tc: ToolChain, test: TestFile) -> str:
+        return f"{exe.id}:{tc.name}:{test.digest}"
+
+    def record(self, exe: Executable, tc: ToolChain, result: TestResult):
+        """
+        Remember how long the whole toolchain took for a test and whether it passed.
+        """
+        if result.cached:
+            return
+        duration = sum(cr.time for cr in result.command_history)
+        self.entries[self.key(exe, tc, result.test)] = {
+            "time": round(duration, 4),
+            "passed": result.did_pass
+        }
+
+    def order(self, tests: List[TestFile], exe: Executable, tc: ToolChain,
+              failed_first: bool=False, longest_first: bool=False) -> List[TestFile]:
+        """
+        Reorder tests using their history. Failed-first puts last run's failures, then
+        tests with no history, ahead of passing tests. Longest-first orders by the last
+        recorded duration with unseen tests treated as the longest. Ties keep name order.
+        """
+        if not failed_first and not longest_first:
+            return tests
+
+        def sort_key(test: TestFile):
+            entry = self.entries.get(self.key(exe, tc, test))
+            key = []
+            if failed_first:
+                key.append(1 if entry is None else (2 if entry["passed"] else 0))
+            if longest_first:
+                key.append(-entry["time"] if entry else float("-inf"))
+            return key
+
+        return sorted(tests, key=sort_key)
+
+    def save(self):
+        json_to_file(self.path, self.entries)
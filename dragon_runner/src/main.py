@@ -1,9 +1,11 @@
+from typing                         import Optional
 from colorama                       import init, Fore
 from dragon_runner.src.cli          import Mode, parse_cli_args, ServerArgs, ScriptArgs
 from dragon_runner.src.config       import load_config
 from dragon_runner.src.log          import log, log_multiline
 from dragon_runner.scripts.loader   import Loader
 from dragon_runner.src.server       import serve
+from dragon_runner.src.staging      import StagingArea
 from dragon_runner.src.harness      import * 
 
 # initialize terminal colors
@@ -49,31 +51,58 @@ def main():
             print(f"Could not find package named after CCID: {ccid}")
             return 1
 
-    # display the config info before running tests
-    config.log_test_info()
+    # copy executables and tests off of slow network storage
+    staging = StagingArea(cli_args.stage_dir or None) if cli_args.stage else None
+    try:
+        if staging:
+            staging.stage_config(config)
 
+        # display the config info before running tests
+        config.log_test_info()
+
+        harness = create_harness(config, cli_args)
+        if harness is None:
+            return 1
+        success = harness.run()
+    finally:
+        if staging:
+            staging.cleanup()
+    if success:
+        return 0
+    return 1
+
+def create_harness(config, cli_args) -> Optional[TestHarness]:
+    """
+    Create the harness for the requested mode, or None if the config cannot run in it.
+    """
     if cli_args.mode == Mode.REGULAR:
         # run in regular mode
-        harness = RegularHarness(config, cli_args)
+        return RegularHarness(config, cli_args)
 
     elif cli_args.mode == Mode.TOURNAMENT:
         # run the tester in tournament mode
-        harness = TournamentHarness(config, cli_args)
+        return TournamentHarness(config, cli_args)
 
     elif cli_args.mode == Mode.MEMCHECK:
         # check tests for memory leaks
-        harness = MemoryCheckHarness(config, cli_args)
+        return MemoryCheckHarness(config, cli_args)
+
+    elif cli_args.mode == Mode.COMBINED:
+        # check outputs, then leak check the passing tests' artifacts
+        if not config.leak_checker:
+            log("Combined mode needs a leakChecker in the config")
+            return None
+        return CombinedHarness(config, cli_args)
 
     elif cli_args.mode == Mode.PERF:
         # performance testing
-        harness = PerformanceTestingHarness(config, cli_args) 
+        return PerformanceTestingHarness(config, cli_args) 
+
+    elif cli_args.mode == Mode.SCALING:
+        # performance testing over growing input sizes
+        return ScalingHarness(config, cli_args)
     else:
         raise RuntimeError(f"Failed to provide valid mode: {cli_args.mode}")
-    
-    success = harness.run()
-    if success:
-        return 0
-    return 1
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,107 @@
+import os
+import numpy as np
+from typing                         import List, Optional, Tuple
+from dragon_runner.src.config       import Executable, Package, SubPackage
+from dragon_runner.src.testfile     import TestFile
+
+class ResultMatrix:
+    """
+    Every defender's verdict on every attacking test for one toolchain. Verdicts are
+    kept as a defenders x tests boolean matrix, along with which cells were actually
+    run, so tournament tables can be re-derived or re-weighted without a rerun.
+    """
+    def __init__(self, toolchain: str, defenders: List[str], attackers: List[str],
+                 tests: List[str], test_attacker: List[int],
+                 passed: Optional[np.ndarray]=None, ran: Optional[np.ndarray]=None):
+        self.toolchain      = toolchain
+        self.defenders      = list(defenders)
+        self.attackers      = list(attackers)
+        self.tests          = list(tests)
+        self.test_attacker  = np.asarray(test_attacker, dtype=np.int32)
+        shape = (len(self.defenders), len(self.tests))
+        self.passed         = passed if passed is not None else np.zeros(shape, dtype=bool)
+        self.ran            = ran if ran is not None else np.zeros(shape, dtype=bool)
+        self.defender_index = {d: i for i, d in enumerate(self.defenders)}
+        self.test_index     = {(self.attackers[a], t): i
+                               for i, (a, t) in enumerate(zip(self.test_attacker, self.tests))}
+
+    @staticmethod
+    def test_key(pkg: Package, spkg: SubPackage, test: TestFile) -> str:
+        """
+        Identify a test by its path relative to the attacking package.
+        """
+        return os.path.join(os.path.relpath(spkg.path, pkg.path), test.file)
+
+    @classmethod
+    def from_packages(cls, toolchain: str, defenders: List[Executable],
+                      attackers: List[Package]) -> 'ResultMatrix':
+        tests, test_attacker = [], []
+        for a, pkg in enumerate(attackers):
+            for spkg in pkg.subpackages:
+                for test in spkg.tests:
+                    tests.append(cls.test_key(pkg, spkg, test))
+                    test_attacker.append(a)
+        return cls(toolchain, [exe.id for exe in defenders], [pkg.name for pkg in attackers],
+                   tests, test_attacker)
+
+    def record(self, defender: str, attacker: str, test: str, passed: bool):
+        d = self.defender_index[defender]
+        t = self.test_index[(attacker, test)]
+        self.passed[d, t] = passed
+        self.ran[d, t] = True
+
+    def cell_counts(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the defenders x attackers matrices of passed and run test counts.
+        """
+        owner = np.zeros((len(self.tests), len(self.attackers)), dtype=np.int64)
+        owner[np.arange(len(self.tests)), self.test_attacker] = 1
+        passes = (self.passed & self.ran).astype(np.int64) @ owner
+        totals = self.ran.astype(np.int64) @ owner
+        return passes, totals
+
+    def pass_rates(self) -> np.ndarray:
+        passes, totals = self.cell_counts()
+        return np.divide(passes, totals, out=np.zeros(passes.shape), where=totals > 0)
+
+    def to_table(self) -> List[List[str]]:
+        """
+        Rebuild the toolchain table exactly as the tournament writes it to CSV.
+        """
+        passes, totals = self.cell_counts()
+        table = [[self.toolchain] + self.attackers]
+        for d, defender in enumerate(self.defenders):
+            table.append([defender] + [f"{p}/{t}" for p, t in zip(passes[d], totals[d])])
+        return table
+
+    def test_strength(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each test, count how many defenders other than its own team ran and failed it.
+        """
+        own = np.array(self.defenders)[:, None] == np.array(self.attackers)[self.test_attacker][None, :]
+        ran = self.ran & ~own
+        failed = (ran & ~self.passed).sum(axis=0)
+        return failed, ran.sum(axis=0)
+
+    def save(self, path: str):
+        np.savez_compressed(path,
+                            toolchain=np.array(self.toolchain),
+                            defenders=np.array(self.defenders),
+                            attackers=np.array(self.attackers),
+                            tests=np.array(self.tests),
+                            test_attacker=self.test_attacker,
+                            passed=np.packbits(self.passed, axis=1),
+                            ran=np.packbits(self.ran, axis=1))
+
+    @classmethod
+    def load(cls, path: str) -> 'ResultMatrix':
+        with np.load(path) as data:
+            n_tests = len(data["tests"])
+            unpack = lambda bits: np.unpackbits(bits, axis=1, count=n_tests).astype(bool)
+            return cls(str(data["toolchain"]),
+                       data["defenders"].tolist(),
+                       data["attackers"].tolist(),
+                       data["tests"].tolist(),
+                       data["test_attacker"],
+                       passed=unpack(data["passed"]),
+                       ran=unpack(data["ran"]))
@@ -0,0 +1,172 @@
+import os
+import csv
+import platform
+import statistics
+from typing                         import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from dragon_runner.src.runner       import TestResult
+from dragon_runner.src.testfile     import TestFile
+from dragon_runner.src.toolchain    import ToolChain
+from dragon_runner.src.affinity     import format_cpu_list
+from dragon_runner.src.stats        import summarize
+
+# Columns of the long-format performance results, one row per measured cell and step
+LONG_COLUMNS = ["executable", "toolchain", "test", "step", "status", "trials",
+                "min", "median", "mean", "stddev", "user", "sys", "maxrss", "faults",
+                "samples", "seed", "cpus", "node", "calibration"]
+
+# Step name of the long-format row holding a cell's score, the sum of its scored steps
+SCORE_STEP = "score"
+
+def record_key(test: TestFile, test_dir: str) -> str:
+    """
+    Identify a test's perf records by its path relative to the config's test directory
+    rather than its file name, which tests in different packages can share. The key
+    does not depend on where the tests are checked out, so long files from several
+    machines still line up. The sizes of a scaling test are told apart by their
+    variant names.
+    """
+    return os.path.relpath(os.path.join(os.path.dirname(test.path), test.file), test_dir)
+
+class StepSamples:
+    """
+    Wall, user and system CPU times, peak RSS (KiB) and page faults of one step (or
+    of the scored steps together) over the passing trials of a cell.
+    """
+    def __init__(self):
+        self.time: List[float] = []
+        self.user: List[float] = []
+        self.sys: List[float] = []
+        self.maxrss: List[float] = []
+        self.faults: List[float] = []
+
+    def add(self, time: float, user: Optional[float]=None, sys: Optional[float]=None,
+            maxrss: Optional[int]=None, faults: Optional[int]=None):
+        self.time.append(time)
+        if user is not None:
+            self.user.append(user)
+            self.sys.append(sys)
+            self.maxrss.append(maxrss)
+            self.faults.append(faults)
+
+class PerfRecord:
+    """
+    The measured trials of one (executable, toolchain, test) cell. A cell whose
+    trial fails or times out stops early and keeps that status. Interleaved cells
+    record the seed that ordered their trials. The CPUs the trials were allowed to
+    run on are kept so timings from different runs can be compared.
+
+    Every step of a passing trial is measured. The trial's score is the total time
+    of the toolchain's scored steps, and its memory footprint their highest peak RSS
+    and total page faults.
+
+    Each record names the machine it was measured on and, when the run was calibrated,
+    the time that machine took for the reference workload.
+    """
+    def __init__(self, exe: str, tc: ToolChain, test: str, seed: Optional[int]=None,
+                 calibration: Optional[float]=None):
+        self.exe                    = exe
+        self.toolchain              = tc.name
+        self.test                   = test
+        self.seed                   = seed
+        self.node                   = platform.node()
+        self.calibration            = calibration
+        self.status                 = "pass"
+        self.step_names             = [step.name for step in tc]
+        self.scored_steps           = tc.scored_steps
+        self.score                  = StepSamples()
+        self.steps: Dict[str, StepSamples] = {name: StepSamples() for name in self.step_names}
+        self.cpus: Set[int]         = set()
+        self.last_result: Optional[TestResult] = None
+
+    def add(self, result: TestResult, cpus: Optional[Iterable[int]]=None):
+        self.last_result = result
+        self.cpus.update(cpus or [])
+        if result.did_timeout:
+            self.status = "timeout"
+        elif not result.did_pass:
+            self.status = "fail"
+        else:
+            scored = []
+            for name, cr in zip(self.step_names, result.command_history):
+                self.steps[name].add(cr.time, cr.user_time, cr.sys_time, cr.max_rss, cr.page_faults)
+                if name in self.scored_steps:
+                    scored.append(cr)
+            if all(cr.rusage for cr in scored):
+                self.score.add(sum(cr.time for cr in scored),
+                               sum(cr.user_time for cr in scored),
+                               sum(cr.sys_time for cr in scored),
+                               max(cr.max_rss for cr in scored),
+                               sum(cr.page_faults for cr in scored))
+            else:
+                self.score.add(sum(cr.time for cr in scored))
+
+    @property
+    def samples(self) -> List[float]:
+        return self.score.time
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "pass"
+
+    def wide_value(self, timeout: float) -> float:
+        """
+        The value reported in perf.csv: the median score, or the timeout on failure.
+        """
+        if not self.passed or not self.samples:
+            return timeout
+        return round(summarize(self.samples)["median"], 4)
+
+    def mem_value(self):
+        """
+        The value reported in mem.csv: the median peak RSS in KiB, or blank on failure.
+        """
+        if not self.passed or not self.score.maxrss:
+            return ''
+        return int(statistics.median(self.score.maxrss))
+
+    def long_row(self, step: str, samples: StepSamples) -> List:
+        stats = summarize(samples.time)
+        median = lambda xs: round(statistics.median(xs), 6) if xs else ''
+        return [self.exe, self.toolchain, self.test, step, self.status, len(samples.time),
+                *(round(stats[k], 6) for k in ("min", "median", "mean", "stddev")),
+                median(samples.user), median(samples.sys), median(samples.maxrss), median(samples.faults),
+                ' '.join(f"{s:.6f}" for s in samples.time),
+                '' if self.seed is None else self.seed,
+                format_cpu_list(self.cpus), self.node,
+                '' if self.calibration is None else round(self.calibration, 6)]
+
+    def long_rows(self) -> List[List]:
+        """
+        One row for the score followed by one row per step.
+        """
+        return [self.long_row(SCORE_STEP, self.score)] + \
+               [self.long_row(name, self.steps[name]) for name in self.step_names]
+
+def write_wide(path: str, records: Dict[Tuple[str, str, str], PerfRecord],
+               exes: List[str], rows: List[Tuple[str, str, str]], value: Callable[[PerfRecord], Any]):
+    """
+    Write one row per (toolchain, test key, test label) and one column per executable.
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Test"] + exes)
+        for toolchain, key, label in rows:
+            row = [label]
+            for exe in exes:
+                record = records.get((exe, toolchain, key))
+                row.append(value(record) if record else '')
+            writer.writerow(row)
+
+def write_long(path: str, records: Dict[Tuple[str, str, str], PerfRecord]):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(LONG_COLUMNS)
+        for record in records.values():
+            writer.writerows(record.long_rows())
+
+def read_long(path: str, step: str=SCORE_STEP) -> List[Dict[str, str]]:
+    """
+    Read the rows of one step, by default the score, from a long-format results file.
+    """
+    with open(path, 'r', newline='') as f:
+        return [row for row in csv.DictReader(f) if row.get("step", SCORE_STEP) == step]
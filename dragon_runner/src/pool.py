@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+import threading
+from concurrent.futures             import ThreadPoolExecutor
+from typing                         import Callable, Iterable, Iterator, List, TypeVar
+from dragon_runner.src.runner       import ToolChainRunner
+from dragon_runner.src.testfile     import TestFile
+from dragon_runner.src.toolchain    import ToolChain
+
+T = TypeVar('T')
+
+class WorkerPool:
+    """
+    Runs tests for a single toolchain on a pool of threads. Each worker owns a
+    ToolChainRunner with a private working directory so that step output files
+    such as /tmp/test.o never collide between concurrently running tests.
+    """
+    def __init__(self, tc: ToolChain, timeout: float, jobs: int):
+        self.tc                             = tc
+        self.timeout                        = timeout
+        self.jobs                           = max(1, jobs)
+        self.local                          = threading.local()
+        self.lock                           = threading.Lock()
+        self.runners: List[ToolChainRunner] = []
+        self.executor                       = ThreadPoolExecutor(max_workers=self.jobs)
+
+    def runner(self) -> ToolChainRunner:
+        """
+        Get the calling worker's runner, creating it on first use.
+        """
+        if not hasattr(self.local, "runner"):
+            workdir = tempfile.mkdtemp(prefix="dragon-runner-worker-")
+            self.local.runner = ToolChainRunner(self.tc, self.timeout, workdir=workdir)
+            with self.lock:
+                self.runners.append(self.local.runner)
+        return self.local.runner
+
+    def map(self, fn: Callable[[ToolChainRunner, TestFile], T], tests: Iterable[TestFile]) -> Iterator[T]:
+        """
+        Apply fn to every test on the pool, yielding results in submission order.
+        """
+        futures = [self.executor.submit(lambda t: fn(self.runner(), t), test) for test in tests]
+        for future in futures:
+            yield future.result()
+
+    def close(self):
+        """
+        Stop the workers and clean up their runners and working directories.
+        """
+        self.executor.shutdown(wait=True)
+        for runner in self.runners:
+            runner.close()
+            if runner.workdir:
+                shutil.rmtree(runner.workdir, ignore_errors=True)
+        self.runners = []
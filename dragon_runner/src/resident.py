@@ -0,0 +1,131 @@
+"""
+Resident executables are launched once and then fed one job per test over stdin,
+which avoids paying process startup and runtime initialisation for every test.
+
+Protocol (all headers are a single line of UTF-8 JSON terminated by a newline):
+
+    harness  -> exe : {"args": [...], "stdin": <n bytes>}\\n <n bytes of stdin>
+    exe -> harness  : {"exit_status": <int>, "stdout": <n bytes>, "stderr": <m bytes>}\\n
+                      <n bytes of stdout> <m bytes of stderr>
+
+The args are the resolved step arguments without the executable itself, so a step
+`$EXE $INPUT $OUTPUT --interp` sends `[input, output, "--interp"]`. The executable
+should exit when its stdin is closed.
+"""
+import os
+import json
+import time
+import selectors
+import subprocess
+from subprocess                 import CompletedProcess
+from typing                     import Dict, List, Optional
+from dragon_runner.src.log      import log
+
+class ResidentProtocolError(Exception):
+    pass
+
+class ResidentProcess:
+    """
+    A tested executable kept alive across tests. If the process crashes or breaks
+    the protocol it is restarted on the next job, up to max_restarts times, after
+    which the caller should fall back to running one process per test.
+    """
+    def __init__(self, args: List[str], env: Optional[Dict[str, str]]=None, max_restarts: int=3):
+        self.args                               = args
+        self.env                                = env
+        self.max_restarts                       = max_restarts
+        self.restarts                           = 0
+        self.proc: Optional[subprocess.Popen]   = None
+        self.buffer                             = b''
+
+    @property
+    def available(self) -> bool:
+        return self.restarts <= self.max_restarts
+
+    def start(self) -> bool:
+        """
+        Launch the resident process if it is not already running.
+        """
+        if self.proc and self.proc.poll() is None:
+            return True
+        self.buffer = b''
+        try:
+            self.proc = subprocess.Popen(
+                self.args,
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+            return True
+        except Exception as e:
+            log(f"Failed to launch resident executable {self.args[0]}: {e}", level=1)
+            self.proc = None
+            self.restarts += 1
+            return False
+
+    def stop(self):
+        """
+        Close stdin to let the process exit on its own, otherwise kill it.
+        """
+        if not self.proc:
+            return
+        try:
+            if self.proc.stdin:
+                self.proc.stdin.close()
+            self.proc.wait(timeout=1)
+        except Exception:
+            self.proc.kill()
+            self.proc.wait()
+        if self.proc.stdout:
+            self.proc.stdout.close()
+        self.proc = None
+
+    def _read(self, n: int, deadline: float) -> bytes:
+        """
+        Read from the process stdout until n bytes are buffered or the deadline passes.
+        """
+        assert self.proc and self.proc.stdout
+        fd = self.proc.stdout.fileno()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while len(self.buffer) < n or (n < 0 and b'\n' not in self.buffer):
+                remaining = deadline - time.time()
+                if remaining <= 0 or not sel.select(remaining):
+                    raise subprocess.TimeoutExpired(self.args, deadline)
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise ResidentProtocolError("resident executable closed its stdout")
+                self.buffer += chunk
+        if n < 0:
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            return line
+        data, self.buffer = self.buffer[:n], self.buffer[n:]
+        return data
+
+    def run_job(self, args: List[str], stdin: bytes, timeout: float) -> Optional[CompletedProcess]:
+        """
+        Send a single job to the resident process. Returns None if the process crashed
+        or violated the protocol, and raises subprocess.TimeoutExpired like subprocess.run.
+        """
+        if not self.available or not self.start():
+            return None
+        assert self.proc and self.proc.stdin
+        deadline = time.time() + timeout
+        try:
+            header = json.dumps({"args": args, "stdin": len(stdin)}).encode() + b'\n'
+            self.proc.stdin.write(header + stdin)
+            self.proc.stdin.flush()
+            reply = json.loads(self._read(-1, deadline))
+            stdout = self._read(int(reply["stdout"]), deadline)
+            stderr = self._read(int(reply["stderr"]), deadline)
+            return CompletedProcess([self.args[0]] + args, int(reply["exit_status"]), stdout, stderr)
+        except subprocess.TimeoutExpired:
+            # the process state is unknown after a timeout so start fresh next job
+            self.stop()
+            raise subprocess.TimeoutExpired([self.args[0]] + args, timeout)
+        except (OSError, ValueError, KeyError, ResidentProtocolError) as e:
+            log(f"Resident executable {self.args[0]} failed: {e}", level=1)
+            self.stop()
+            self.restarts += 1
+            return None
@@ -4,8 +4,12 @@ import re
 import json
 import time
 import sys
+import select
+import signal
+import selectors
+import threading
 from subprocess                     import CompletedProcess
-from typing                         import List, Dict, Optional, Union
+from typing                         import Any, List, Dict, FrozenSet, Optional, Tuple, Union
 from dataclasses                    import dataclass, asdict
 from colorama                       import Fore, init
 from dragon_runner.src.testfile     import TestFile 
@@ -13,6 +17,7 @@ from dragon_runner.src.config       import Executable, ToolChain
 from dragon_runner.src.log          import log, log_multiline
 from dragon_runner.src.toolchain    import Step
 from dragon_runner.src.cli          import CLIArgs, RunnerArgs
+from dragon_runner.src.resident     import ResidentProcess
 from dragon_runner.src.utils        import make_tmp_file, bytes_to_str,\
                                        file_to_bytes, truncated_bytes,\
                                        file_to_str
@@ -22,6 +27,25 @@ init(autoreset=True)
 # Reserve a specific status code to use for valgrind
 VALGRIND_EXIT_CODE = 111
 
+# LeakSanitizer's closing summary, reported by both ASan and standalone LSan builds
+SANITIZER_LEAK_SUMMARY = re.compile(rb"SUMMARY: (?:Address|Leak)Sanitizer: (\d+) byte\(s\) leaked in (\d+) allocation\(s\)")
+
+# Any other AddressSanitizer error, e.g. heap-buffer-overflow, which is a real failure
+SANITIZER_ERROR = re.compile(rb"ERROR: AddressSanitizer:")
+
+def parse_sanitizer_leaks(stderr: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Total leaked bytes and allocations in the LeakSanitizer reports of stderr, or
+    None if nothing leaked. Reports from child processes are added together.
+    """
+    summaries = SANITIZER_LEAK_SUMMARY.findall(stderr or b'')
+    if not summaries:
+        return None
+    return sum(int(b) for b, _ in summaries), sum(int(a) for _, a in summaries)
+
+# How the leak check of a passing test is reported next to its verdict
+LEAK_LABELS = {"clean": "NO-LEAK", "leak": "LEAK", "timeout": "LEAK-CHECK TIMEOUT", "error": "LEAK-CHECK ERROR"}
+
 @dataclass
 class MagicParams:
     exe_path: str                       # $EXE
@@ -38,6 +62,88 @@ class Command:
         self.args: List[str]    = args
         self.cmd: str           = self.args[0] 
 
+def run_with_rusage(args: List[str], stdin: bytes, timeout: float,
+                    cpus: Optional[FrozenSet[int]]=None, **kwargs) -> CompletedProcess:
+    """
+    Equivalent of subprocess.run capturing stdout and stderr, with the child's
+    resource usage attached to the returned CompletedProcess as rusage. Like
+    communicate, the pipes are serviced with a selector until the child closes its
+    output, then the child is reaped with os.wait4. A timer kills the child once the
+    timeout expires, and output still held open by a descendant at the deadline
+    counts as a timeout too, so a backgrounded grandchild cannot stall the run.
+
+    The child is pinned to cpus right after it is spawned, since preexec_fn is not
+    safe to use while other threads are running.
+    """
+    deadline = time.monotonic() + timeout
+    process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, **kwargs)
+    if cpus:
+        try:
+            os.sched_setaffinity(process.pid, cpus)
+        except ProcessLookupError:
+            pass # the child has already exited
+
+    # os.kill rather than process.kill, which polls and would reap the child before wait4
+    expired = threading.Event()
+    def expire():
+        expired.set()
+        try:
+            os.kill(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass # the child has already been reaped
+    timer = threading.Timer(timeout, expire)
+    timer.start()
+
+    output = {process.stdout: [], process.stderr: []}
+    written = 0
+    try:
+        with selectors.DefaultSelector() as selector:
+            selector.register(process.stdout, selectors.EVENT_READ)
+            selector.register(process.stderr, selectors.EVENT_READ)
+            if stdin:
+                selector.register(process.stdin, selectors.EVENT_WRITE)
+            else:
+                process.stdin.close()
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    expire()
+                    break
+                for key, _ in selector.select(remaining):
+                    if key.fileobj is process.stdin:
+                        try:
+                            written += os.write(key.fd, stdin[written:written + select.PIPE_BUF])
+                        except BrokenPipeError:
+                            written = len(stdin) # the child exited without reading all of its input
+                        if written >= len(stdin):
+                            selector.unregister(key.fileobj)
+                            key.fileobj.close()
+                    else:
+                        chunk = os.read(key.fd, 32768)
+                        output[key.fileobj].append(chunk)
+                        if not chunk:
+                            selector.unregister(key.fileobj)
+                            key.fileobj.close()
+        _, status, rusage = os.wait4(process.pid, 0)
+    except BaseException:
+        expire()
+        process.wait()
+        raise
+    finally:
+        timer.cancel()
+        for stream in (process.stdin, process.stdout, process.stderr):
+            stream.close()
+    # decoded by hand, os.waitstatus_to_exitcode needs Python 3.9
+    process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+    stdout, stderr = b''.join(output[process.stdout]), b''.join(output[process.stderr])
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(args, timeout, stdout, stderr)
+    result = CompletedProcess(args, process.returncode, stdout, stderr)
+    result.rusage = rusage
+    return result
+
 @dataclass
 class CommandResult:
     cmd:str
@@ -46,6 +152,31 @@ class CommandResult:
     time: float=0
     timed_out: bool=False
 
+    @property
+    def rusage(self) -> Any:
+        return getattr(self.subprocess, "rusage", None)
+
+    @property
+    def user_time(self) -> Optional[float]:
+        return self.rusage.ru_utime if self.rusage else None
+
+    @property
+    def sys_time(self) -> Optional[float]:
+        return self.rusage.ru_stime if self.rusage else None
+
+    @property
+    def max_rss(self) -> Optional[int]:
+        """
+        Peak resident set size in KiB (macOS reports bytes).
+        """
+        if not self.rusage:
+            return None
+        return self.rusage.ru_maxrss // 1024 if sys.platform == "darwin" else self.rusage.ru_maxrss
+
+    @property
+    def page_faults(self) -> Optional[int]:
+        return self.rusage.ru_minflt + self.rusage.ru_majflt if self.rusage else None
+
     def log(self, level:int=0, indent=0):
         if self.subprocess:
             stdout = self.subprocess.stdout
@@ -75,12 +206,29 @@ class TestResult:
         self.did_timeout: bool = False 
         self.error_test: bool = False
         self.memory_leak: bool = False
+        self.cached: bool = False
         self.command_history: List[CommandResult] = []
 
         # optional fields
         self.gen_output: Optional[bytes] = None
         self.time: Optional[float] = None
         self.failing_step: Optional[str] = None
+        self.skip_reason: Optional[str] = None
+        self.leak_status: Optional[str] = None
+        self.leaked_bytes: Optional[int] = None
+        self.leak_allocations: Optional[int] = None
+
+    def record_sanitizer_leaks(self, stderr: bytes) -> bool:
+        """
+        Mark the test as leaking if stderr holds a LeakSanitizer report. Returns True
+        when the leaks were the only error the sanitizer reported.
+        """
+        leaks = parse_sanitizer_leaks(stderr)
+        if leaks is None:
+            return False
+        self.memory_leak = True
+        self.leaked_bytes, self.leak_allocations = leaks
+        return not SANITIZER_ERROR.search(stderr)
 
     def log(self, file=sys.stdout, args: Union['RunnerArgs', None]=None):
         """
@@ -93,6 +241,11 @@ class TestResult:
         timeout_msg = "[TIMEOUT] "
 
         test_name = f"{self.test.file:<50}".strip()    
+        if self.cached:
+            test_name += Fore.CYAN + " (cached)" + Fore.RESET
+        if self.leak_status:
+            color = Fore.YELLOW if self.leak_status != "clean" else Fore.GREEN
+            test_name += color + f" [{LEAK_LABELS[self.leak_status]}]" + Fore.RESET
         show_time = args and args.time and self.time is not None
         if self.did_timeout:
             log(Fore.YELLOW + timeout_msg + Fore.RESET + f"{test_name.strip()}", indent=4, file=file)
@@ -105,6 +258,8 @@ class TestResult:
                 time_display = f"{time_str:>10} (s)" 
             log_msg = f"{Fore.GREEN}{pass_msg}{Fore.RESET}{test_name}{time_display}"
             log(log_msg, indent=4, file=file)
+        elif self.skip_reason:
+            log(Fore.RED + fail_msg + Fore.RESET + f"{test_name} ({self.skip_reason})", indent=4, file=file)
         else:
             log(Fore.RED + fail_msg + Fore.RESET + f"{test_name}", indent=4, file=file)
     
@@ -133,12 +288,18 @@ class TestResult:
         return "PASS" if self.did_pass else "FAIL"
     
 class ToolChainRunner():
-    def __init__(self, tc: ToolChain, timeout: float, env: Dict[str, str]={}):
+    def __init__(self, tc: ToolChain, timeout: float, env: Dict[str, str]={},
+                 workdir: Optional[str]=None):
         self.tc                     = tc
         self.timeout                = timeout
         self.env                    = env
+        self.workdir                = workdir
         self.reserved_exit_codes    = [VALGRIND_EXIT_CODE]
         self.RUNTIME_ERRORS         = ["SizeError", "IndexError", "MathError", "StrideError"]
+        self.residents: Dict[str, ResidentProcess] = {}
+        self.cpus: Optional[FrozenSet[int]] = None
+        self.leak_cache                     = None
+        self.leak_key                       = None
     
     def handle_error_test(self, tr: TestResult, produced: bytes, expected: bytes):
         """
@@ -197,20 +358,19 @@ class ToolChainRunner():
 
     def run_command(self, command, stdin: bytes) -> CommandResult:
         """
-        Run a command and return the CommandResult
+        Run a command and return the CommandResult. When the runner has been given
+        CPUs, the command is pinned to them as soon as it is spawned.
         """
         env = os.environ.copy()
         start_time = time.time()
         cr = CommandResult(cmd=command.cmd)
         try:
-            result = subprocess.run(
+            result = run_with_rusage(
                 command.args,
-                env=env,
-                input=stdin,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=False,
-                timeout=self.timeout
+                stdin,
+                self.timeout,
+                cpus=self.cpus,
+                env=env
             )
             wall_time = time.time() - start_time
             cr.subprocess = result
@@ -223,14 +383,79 @@ class ToolChainRunner():
         except Exception:
             cr.exit_status = 1
         return cr
+
+    def run_resident_command(self, step: Step, command: Command, stdin: bytes) -> CommandResult:
+        """
+        Hand the command to a resident instance of its executable. If the resident
+        process crashes, fall back to running the command as its own process.
+        """
+        resident = self.residents.get(command.cmd)
+        if resident is None:
+            launch_args = [command.cmd] + (step.resident_args or [])
+            resident = ResidentProcess(launch_args, env=os.environ.copy())
+            self.residents[command.cmd] = resident
+        
+        if resident.available:
+            start_time = time.time()
+            cr = CommandResult(cmd=command.cmd)
+            try:
+                result = resident.run_job(command.args[1:], stdin, self.timeout)
+                if result is not None:
+                    cr.subprocess = result
+                    cr.exit_status = result.returncode
+                    cr.time = time.time() - start_time
+                    return cr
+            except subprocess.TimeoutExpired:
+                cr.time = self.timeout
+                cr.timed_out = True
+                cr.exit_status = 255
+                return cr
+        return self.run_command(command, stdin)
+
+    def run_leak_check(self, tr: TestResult, checker: List[str]):
+        """
+        Run the final command of a test again under the leak checker, reusing the
+        artifact the toolchain already built. The checker must exit with
+        VALGRIND_EXIT_CODE when it finds a leak, e.g. valgrind --error-exitcode=111,
+        or print a LeakSanitizer report. Error tests which passed on a failing step
+        have no program to check.
+        """
+        if tr.failing_step is not None or len(tr.command_history) != len(self.tc):
+            return
+        last = tr.command_history[-1]
+        if last.subprocess is None:
+            return
+        step = self.tc.steps[len(tr.command_history) - 1]
+        stdin = tr.test.get_input_stream() if step.uses_ins else b''
+        cr = self.run_command(Command(checker + list(last.subprocess.args)), stdin)
+        if cr.timed_out:
+            tr.leak_status = "timeout"
+        elif cr.subprocess is None:
+            tr.leak_status = "error"
+        elif tr.record_sanitizer_leaks(cr.subprocess.stderr) or cr.exit_status == VALGRIND_EXIT_CODE:
+            tr.leak_status = "leak"
+        else:
+            tr.leak_status = "clean" if cr.exit_status == 0 else "error"
+        tr.memory_leak = tr.leak_status == "leak"
+
+    def close(self):
+        """
+        Shut down any resident executables started by this runner.
+        """
+        for resident in self.residents.values():
+            resident.stop()
+        self.residents = {}
         
     def resolve_output_file(self, step: Step) -> Optional[str]:
         """
-        make absolute path from output file in step
+        make absolute path from output file in step. Runners with a private working
+        directory keep every output file inside of it.
         """
-        current_dir = os.getcwd()
-        output_file = os.path.join(current_dir, step.output) if step.output else None
-        return output_file
+        if not step.output:
+            return None
+        if self.workdir:
+            return os.path.join(self.workdir, os.path.basename(step.output))
+        return os.path.join(os.getcwd(), step.output)
     
     def resolve_command(self, step: Step, params: MagicParams) -> Command:
         """
@@ -245,6 +470,18 @@ class ToolChainRunner():
         return command
     
     def run(self, test: TestFile, exe: Executable) -> TestResult: 
+        """
+        run each step of the toolchain for a given test and executable. With a leak
+        cache, the verdict from the leak check step on is reused for unchanged artifacts
+        and recorded once the run completes.
+        """
+        self.leak_key = None
+        tr = self.run_steps(test, exe)
+        if self.leak_key:
+            self.leak_cache.put(self.leak_key, tr)
+        return tr
+
+    def run_steps(self, test: TestFile, exe: Executable) -> TestResult: 
         """
         run each step of the toolchain for a given test and executable
         """
@@ -259,10 +496,22 @@ class ToolChainRunner():
             input_stream = test.get_input_stream() if step.uses_ins else b''
             output_file = self.resolve_output_file(step)
             
+            # answer the rest of the toolchain from the leak cache for a known artifact
+            if step.leak_check and self.leak_cache is not None and self.leak_key is None:
+                self.leak_key = self.leak_cache.artifact_key(self.tc, index, input_file, test, self.timeout)
+                cached = self.leak_cache.get(self.leak_key, test) if self.leak_key else None
+                if cached is not None:
+                    self.leak_key = None
+                    cached.command_history = tr.command_history
+                    return cached
+
             # resolve magic parameters for currents step
             magic_params = MagicParams(exe.exe_path, input_file, output_file)
             command = self.resolve_command(step, magic_params)
-            command_result  = self.run_command(command, input_stream) 
+            if step.resident:
+                command_result = self.run_resident_command(step, command, input_stream)
+            else:
+                command_result = self.run_command(command, input_stream)
             
             # save command history for logging
             tr.command_history.append(command_result)
@@ -298,7 +547,10 @@ class ToolChainRunner():
                 if child_process.returncode == VALGRIND_EXIT_CODE:
                     tr.memory_leak = True 
             
-            if child_process.returncode != 0 and \
+            # a sanitized binary which only leaked exits nonzero without having failed
+            only_leaked = step.leak_check and tr.record_sanitizer_leaks(step_stderr)
+            
+            if child_process.returncode != 0 and not only_leaked and \
                child_process.returncode not in self.reserved_exit_codes:
                 """
                 A step in the toolchain has returned a non-zero exit status. If "allowError"
@@ -0,0 +1,127 @@
+import os
+import csv
+import sys
+import copy
+import subprocess
+import statistics
+from typing                         import Dict, List, Optional, Tuple
+from dragon_runner.src.testfile     import TestFile
+from dragon_runner.src.perf         import SCORE_STEP, PerfRecord
+from dragon_runner.src.stats        import crossover, power_fit
+
+# Columns of scaling.csv, one row per fitted (executable, toolchain, test, step) curve
+SCALING_COLUMNS = ["executable", "toolchain", "test", "step", "exponent", "coefficient",
+                   "r2", "crossover", "sizes", "medians"]
+
+class ScalingSpec:
+    """
+    How a scaling test grows, declared with directives in the test:
+
+        // SIZES: 1000 2000 4000 8000
+        // INPUT_GENERATOR: gen_input.py     (stdout becomes the input stream)
+        // SOURCE_GENERATOR: gen_source.py   (stdout becomes the test program)
+
+    Generators are run as `generator SIZE` from the test's directory.
+    """
+    def __init__(self, test: TestFile, sizes: List[int],
+                 input_generator: Optional[str], source_generator: Optional[str]):
+        self.test               = test
+        self.sizes              = sizes
+        self.input_generator    = input_generator
+        self.source_generator   = source_generator
+
+    @classmethod
+    def from_test(cls, test: TestFile) -> Optional['ScalingSpec']:
+        sizes = test.get_directive("SIZES:")
+        input_generator = test.get_directive("INPUT_GENERATOR:")
+        source_generator = test.get_directive("SOURCE_GENERATOR:")
+        if not sizes or not (input_generator or source_generator):
+            return None
+        resolve = lambda gen: os.path.join(os.path.dirname(test.path), gen.strip()) if gen else None
+        return cls(test, sorted(int(size) for size in sizes.split()),
+                   resolve(input_generator), resolve(source_generator))
+
+    @staticmethod
+    def generate(generator: str, size: int, timeout: float) -> bytes:
+        command = [generator, str(size)]
+        if generator.endswith(".py") and not os.access(generator, os.X_OK):
+            command = [sys.executable] + command
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                cwd=os.path.dirname(generator), timeout=timeout, check=True)
+        return result.stdout
+
+    def variant(self, size: int, workdir: str, timeout: float) -> TestFile:
+        """
+        Create the test at one size. The variant is named stem@size so that every
+        size is its own row in the perf results.
+        """
+        name = f"{self.test.stem}@{size}{self.test.extension}"
+        if self.source_generator:
+            path = os.path.join(workdir, name)
+            with open(path, 'wb') as f:
+                f.write(self.generate(self.source_generator, size, timeout))
+            test = TestFile(path)
+        else:
+            test = copy.copy(self.test)
+            test.stem, test.file = f"{self.test.stem}@{size}", name
+        if self.input_generator:
+            test.set_input_stream(self.generate(self.input_generator, size, timeout))
+        return test
+
+class ScalingCurve:
+    """
+    The perf records of one scaling test, keyed by size, for every executable.
+    """
+    def __init__(self, toolchain: str, test: str, step_names: List[str], variants: Dict[int, str]):
+        self.toolchain  = toolchain
+        self.test       = test
+        self.step_names = step_names
+        self.variants   = variants
+
+    def points(self, records: Dict[Tuple[str, str, str], PerfRecord],
+               exe: str, step: str) -> Tuple[List[int], List[float]]:
+        """
+        Sizes and median times of the passing runs of one executable's step.
+        """
+        sizes, medians = [], []
+        for size, key in self.variants.items():
+            record = records.get((exe, self.toolchain, key))
+            if record is None or not record.passed:
+                continue
+            samples = record.score if step == SCORE_STEP else record.steps[step]
+            if samples.time:
+                sizes.append(size)
+                medians.append(statistics.median(samples.time))
+        return sizes, medians
+
+    def rows(self, records: Dict[Tuple[str, str, str], PerfRecord],
+             exes: List[str], solution: Optional[str]) -> List[List]:
+        """
+        Fit time = coefficient * size ** exponent for the score and every step of each
+        executable. The crossover is the size at which the executable's curve meets the
+        solution's, blank if either could not be fit or the curves are parallel.
+        """
+        rows = []
+        for step in [SCORE_STEP] + self.step_names:
+            fits = {exe: power_fit(*self.points(records, exe, step)) for exe in exes}
+            for exe in exes:
+                sizes, medians = self.points(records, exe, step)
+                fit, reference = fits[exe], fits.get(solution)
+                cross = crossover(fit, reference) if fit and reference and exe != solution else None
+                coefficient, exponent, r2 = fit if fit else ('', '', '')
+                rows.append([exe, self.toolchain, self.test, step,
+                             round(exponent, 4) if fit else '',
+                             f"{coefficient:.6g}" if fit else '',
+                             round(r2, 4) if fit else '',
+                             '' if cross is None else f"{cross:.6g}",
+                             ' '.join(map(str, sizes)),
+                             ' '.join(f"{m:.6f}" for m in medians)])
+        return rows
+
+def write_scaling(path: str, curves: List[ScalingCurve], records: Dict[Tuple[str, str, str], PerfRecord],
+                  exes: List[str], solution: Optional[str]):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(SCALING_COLUMNS)
+        for curve in curves:
+            writer.writerows(curve.rows(records, exes, solution))
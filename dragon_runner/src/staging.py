@@ -0,0 +1,98 @@
+import os
+import shutil
+import hashlib
+import tempfile
+from typing                     import Dict, Optional
+from dragon_runner.src.config   import Config
+from dragon_runner.src.log      import log
+from dragon_runner.src.utils    import file_digest
+
+def default_staging_root() -> str:
+    """
+    Prefer a RAM-backed tmpfs, otherwise fall back to the system temp directory.
+    """
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+# Installed toolchains locate their helpers relative to their install prefix and
+# are on local disk anyway, so they are never staged.
+SYSTEM_PREFIXES = ("/usr/", "/bin/", "/sbin/", "/lib/", "/lib64/", "/opt/", "/nix/")
+
+def is_system_path(path: str) -> bool:
+    return os.path.realpath(path).startswith(SYSTEM_PREFIXES)
+
+class StagingArea:
+    """
+    Copies tested executables, their runtimes and the test tree into RAM-backed
+    storage keyed by content hash, then points the in memory config at the copies.
+    Tests submitted over NFS no longer pay network latency on every exec and read.
+    """
+    def __init__(self, root: Optional[str]=None):
+        self.root = tempfile.mkdtemp(prefix="dragon-runner-", dir=root or default_staging_root())
+        self.staged: Dict[str, str] = {}
+
+    def stage_file(self, path: str) -> str:
+        """
+        Copy a single file into the staging area, preserving its name and mode.
+        """
+        if path in self.staged:
+            return self.staged[path]
+        digest = file_digest(path)
+        dest_dir = os.path.join(self.root, digest[:16])
+        dest = os.path.join(dest_dir, os.path.basename(path))
+        if not os.path.exists(dest):
+            os.makedirs(dest_dir, exist_ok=True)
+            shutil.copy2(path, dest)
+        self.staged[path] = dest
+        return dest
+
+    def stage_tree(self, path: str) -> str:
+        """
+        Copy a directory tree into the staging area under a hash of its contents.
+        """
+        if path in self.staged:
+            return self.staged[path]
+        sha = hashlib.sha256()
+        for parent, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = os.path.join(parent, file)
+                sha.update(os.path.relpath(file_path, path).encode())
+                sha.update(file_digest(file_path).encode())
+        dest = os.path.join(self.root, sha.hexdigest()[:16], os.path.basename(os.path.normpath(path)))
+        if not os.path.exists(dest):
+            shutil.copytree(path, dest, symlinks=True)
+        self.staged[path] = dest
+        return dest
+
+    def stage_config(self, config: Config):
+        """
+        Stage every executable, runtime and test in the config and rewrite their
+        paths in place. System installed executables and tests outside of testDir
+        (e.g --debug-package) are left alone.
+        """
+        for exe in config.executables:
+            if not is_system_path(exe.exe_path):
+                exe.exe_path = self.stage_file(exe.exe_path)
+                log(f"Staged executable {exe.id} to {exe.exe_path}", level=1)
+            if exe.runtime and not is_system_path(exe.runtime):
+                exe.runtime = self.stage_file(exe.runtime)
+
+        test_dir = os.path.normpath(config.test_dir)
+        staged_dir = self.stage_tree(test_dir)
+        for pkg in config.packages:
+            for spkg in pkg.subpackages:
+                for test in spkg.tests:
+                    rel_path = os.path.relpath(os.path.normpath(test.path), test_dir)
+                    if not rel_path.startswith(os.pardir):
+                        test.path = os.path.join(staged_dir, rel_path)
+        log(f"Staged tests to {staged_dir}", level=1)
+
+    def cleanup(self):
+        """
+        Remove everything staged for this run.
+        """
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.staged = {}
@@ -0,0 +1,119 @@
+import math
+import statistics
+from typing                         import Dict, List, Optional, Tuple
+
+# Two-sided 95% normal quantile
+Z_95 = 1.959964
+
+def wilson_interval(passes: int, n: int, population: Optional[int]=None,
+                    z: float=Z_95) -> Tuple[float, float]:
+    """
+    Wilson score interval for a pass rate estimated from n sampled tests. When the
+    tests are drawn without replacement from a finite population, the interval is
+    narrowed by the finite population correction and collapses once all are run.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    if population is not None and population > 1:
+        z *= math.sqrt(max(population - n, 0) / (population - 1))
+    p = passes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+# Two-sided 95% Student t quantiles by degrees of freedom
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+def mean_ci_halfwidth(samples: List[float]) -> float:
+    """
+    Half-width of the 95% t interval for the mean of the samples.
+    """
+    n = len(samples)
+    if n < 2:
+        return math.inf
+    t = T_95[n - 2] if n - 2 < len(T_95) else Z_95
+    return t * statistics.stdev(samples) / math.sqrt(n)
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Robust and classic summary statistics of repeated timing samples.
+    """
+    if not samples:
+        return {"min": 0.0, "median": 0.0, "mean": 0.0, "stddev": 0.0}
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0
+    }
+
+def mann_whitney(x: List[float], y: List[float]) -> Tuple[float, float]:
+    """
+    Two-sided Mann-Whitney U test of x against y. Returns U for x and the p-value from
+    the normal approximation with tie and continuity corrections.
+    """
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        return 0.0, 1.0
+    values = sorted([(v, 0) for v in x] + [(v, 1) for v in y])
+    n = n1 + n2
+    rank_x = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and values[j + 1][0] == values[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_x += rank * sum(1 for k in range(i, j + 1) if values[k][1] == 0)
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    u = rank_x - n1 * (n1 + 1) / 2
+    mu = n1 * n2 / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))) if n > 1 else 0.0
+    if sigma == 0:
+        return u, 1.0
+    z = (abs(u - mu) - 0.5) / sigma
+    return u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+def cliffs_delta(x: List[float], y: List[float]) -> float:
+    """
+    Effect size in [-1, 1]: how much more often x is greater than y than the reverse.
+    """
+    if not x or not y:
+        return 0.0
+    greater = sum(1 for a in x for b in y if a > b)
+    less = sum(1 for a in x for b in y if a < b)
+    return (greater - less) / (len(x) * len(y))
+
+def power_fit(sizes: List[float], times: List[float]) -> Optional[Tuple[float, float, float]]:
+    """
+    Least squares fit of times = coefficient * sizes ** exponent on a log-log scale.
+    Returns (coefficient, exponent, r2), or None with fewer than two usable points.
+    """
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if n > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    mx = statistics.mean(x for x, _ in points)
+    my = statistics.mean(y for _, y in points)
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    sxy = sum((x - mx) * (y - my) for x, y in points)
+    syy = sum((y - my) ** 2 for _, y in points)
+    exponent = sxy / sxx
+    r2 = sxy * sxy / (sxx * syy) if syy > 0 else 1.0
+    return math.exp(my - exponent * mx), exponent, r2
+
+def crossover(fit: Tuple[float, float, float], reference: Tuple[float, float, float]) -> Optional[float]:
+    """
+    Size at which two power law fits take equal time, or None if they never cross.
+    """
+    (a, b, _), (a_ref, b_ref, _) = fit, reference
+    if b == b_ref:
+        return None
+    return (a_ref / a) ** (1 / (b - b_ref))
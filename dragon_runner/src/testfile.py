@@ -1,4 +1,5 @@
 import os
+import hashlib
 from io                         import BytesIO
 from typing                     import Dict, Optional, Union
 from dragon_runner.src.utils    import file_to_str, str_to_bytes, file_to_bytes
@@ -17,6 +18,7 @@ class TestFile(Verifiable):
         self.comment_syntax = comment_syntax # default C99 //
         self.expected_out: Union[bytes, TestFileError] = self.get_content("CHECK:", "CHECK_FILE:")
         self.input_stream: Union[bytes, TestFileError] = self.get_content("INPUT:", "INPUT_FILE:")
+        self._digest: Optional[str] = None
     
     @classmethod
     def from_test_contents(cls, content: bytes, test_name: str):
@@ -30,6 +32,21 @@ class TestFile(Verifiable):
         Manually set the input stream.
         """
         self.input_stream = input_stream
+        self._digest = None
+
+    @property
+    def digest(self) -> str:
+        """
+        Hash of the test contents along with its input stream and expected output,
+        which may come from files referenced by INPUT_FILE and CHECK_FILE.
+        """
+        if getattr(self, "_digest", None) is None:
+            sha = hashlib.sha256()
+            for part in (file_to_bytes(self.path) or b'', self.get_input_stream(), self.get_expected_out()):
+                sha.update(len(part).to_bytes(8, "little"))
+                sha.update(part)
+            self._digest = sha.hexdigest()
+        return self._digest
 
     def get_input_stream(self) -> bytes:
         """
@@ -49,6 +66,16 @@ class TestFile(Verifiable):
             return self.expected_out
         return b''
 
+    def get_directive(self, directive_prefix: str) -> Optional[str]:
+        """
+        Get the contents of a directive such as "SIZES:" as text, or None if the test
+        does not use it.
+        """
+        contents = self._get_directive_contents(directive_prefix)
+        if not isinstance(contents, bytes) or not contents:
+            return None
+        return contents.decode(errors="replace")
+
     def verify(self) -> ErrorCollection:
         """
         Ensure the paths supplied in CHECK_FILE and INPUT_FILE exist
@@ -165,20 +192,21 @@ class TestFile(Verifiable):
             "input_stream": ins 
         }
 
-    def pretty_print(self) -> str:
+    def pretty_print(self, term_width: Optional[int]=None) -> str:
         """
         Generate a pretty-formatted string representation of the test file contents
-        with borders around it.
+        with borders around it. The terminal is queried for its width unless supplied.
         """
         file_content = file_to_str(self.path)
         if not file_content: 
             return f"Error reading file {self.path}:"
         
         # query size of border to draw for user
-        try:
-            term_width = os.get_terminal_size().columns if hasattr(os, 'get_terminal_size') else 80
-        except OSError:
-            term_width = 80
+        if term_width is None:
+            try:
+                term_width = os.get_terminal_size().columns if hasattr(os, 'get_terminal_size') else 80
+            except OSError:
+                term_width = 80
         content_width = min(term_width - 10, 100) 
         
         # ascii border characters
@@ -1,8 +1,10 @@
 import json
 import os
+import hashlib
 import subprocess
-from typing import Dict, List, Iterator
+from typing import Dict, List, Iterator, Optional
 from dragon_runner.src.errors import *
+from dragon_runner.src.utils import file_digest
 
 class Step(Verifiable):
     def __init__(self, **kwargs):
@@ -13,6 +15,10 @@ class Step(Verifiable):
         self.allow_error    = kwargs.get('allowError', False)
         self.uses_ins       = kwargs.get('usesInStr', False)
         self.uses_runtime   = kwargs.get('usesRuntime', False)
+        self.resident       = kwargs.get('resident', False)
+        self.resident_args  = kwargs.get('residentArguments', [])
+        self.perf_score     = kwargs.get('perfScore', False)
+        self.leak_check     = kwargs.get('leakCheck', os.path.basename(self.exe_path or '') == 'valgrind')
     
     def verify(self) -> ErrorCollection:
         errors = ErrorCollection()
@@ -35,7 +41,11 @@ class Step(Verifiable):
             'output': self.output,
             'allowError': self.allow_error,
             'usesInStr': self.uses_ins,
-            'usesRuntime': self.uses_runtime
+            'usesRuntime': self.uses_runtime,
+            'resident': self.resident,
+            'residentArguments': self.resident_args,
+            'perfScore': self.perf_score,
+            'leakCheck': self.leak_check
         }
 
     def __repr__(self):
@@ -45,7 +55,21 @@ class ToolChain(Verifiable):
     def __init__(self, name: str, steps: List[Dict]):
         self.name       = name
         self.steps      = [Step(**step) for step in steps]
+        self._digest: Optional[str] = None
     
+    @property
+    def digest(self) -> str:
+        """
+        Hash of the toolchain definition and any fixed executables its steps invoke.
+        """
+        if self._digest is None:
+            sha = hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode())
+            for step in self.steps:
+                if step.exe_path and not step.exe_path.startswith('$') and os.path.isfile(step.exe_path):
+                    sha.update(file_digest(step.exe_path).encode())
+            self._digest = sha.hexdigest()
+        return self._digest
+
     def verify(self) -> ErrorCollection:
         errors = ErrorCollection()
         for step in self.steps:
@@ -58,6 +82,15 @@ class ToolChain(Verifiable):
     def __repr__(self):
         return json.dumps(self.to_dict(), indent=2)
     
+    @property
+    def scored_steps(self) -> List[str]:
+        """
+        Names of the steps whose times make up a perf score: those marked perfScore,
+        or the last step if none are.
+        """
+        marked = [step.name for step in self.steps if step.perf_score]
+        return marked or [step.name for step in self.steps[-1:]]
+
     def __iter__(self) -> Iterator[Step]:
         return iter(self.steps)
 
@@ -2,7 +2,9 @@ import os
 import sys
 import tempfile
 import base64
-from typing     import Optional
+import hashlib
+import json
+from typing     import Any, Dict, Optional, Tuple
 from colorama   import init
 
 # Initialize colorama
@@ -150,4 +152,44 @@ def bytes_to_file(file: str, data: bytes) -> Optional[str]:
     except Exception as e:
         print(f"Writting bytes to file failed with: {e}")
         return None
-    
+
+_digest_memo: Dict[Tuple[str, int, int], str] = {}
+
+def file_digest(file: str) -> str:
+    """
+    Return the sha256 hex digest of a file's contents. Digests are memoized on the
+    path, size and modification time so repeated lookups do not re-read the file.
+    """
+    stat = os.stat(file)
+    key = (os.path.realpath(file), stat.st_size, stat.st_mtime_ns)
+    if key not in _digest_memo:
+        sha = hashlib.sha256()
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        _digest_memo[key] = sha.hexdigest()
+    return _digest_memo[key]
+
+def file_to_json(file: str) -> Optional[Any]:
+    """
+    Load a JSON file, returning None if it does not exist or cannot be parsed.
+    """
+    try:
+        with open(file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def json_to_file(file: str, data: Any) -> Optional[str]:
+    """
+    Atomically write data as JSON so an interrupted run never leaves a torn file.
+    """
+    tmp_file = f"{file}.tmp"
+    try:
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, file)
+        return file
+    except Exception as e:
+        print(f"Writting JSON to file failed with: {e}", file=sys.stderr)
+        return None
@@ -0,0 +1,14 @@
+#include <stdio.h>
+
+int main() {
+    long n, total = 0;
+    scanf("%ld", &n);
+    for (long i = 0; i < n; i++) {
+        total = total * 31 + i;
+    }
+    printf("%ld\n", total);
+    return 0;
+}
+
+// SIZES: 1000000 4000000 16000000
+// INPUT_GENERATOR: ../../../scripts/scaling-generators/loop_input.py
@@ -0,0 +1,4 @@
+// The program is generated at each size, only its directives are read.
+
+// SIZES: 250 500 1000
+// SOURCE_GENERATOR: ../../../scripts/scaling-generators/unrolled_source.py
@@ -0,0 +1,4 @@
+import sys
+
+# the input stream of loop.c is the number of iterations to run
+print(sys.argv[1])
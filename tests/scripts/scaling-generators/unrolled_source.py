@@ -0,0 +1,12 @@
+import sys
+
+# a program whose length, and so whose compile time, grows with the size
+n = int(sys.argv[1])
+print("#include <stdio.h>")
+print("int main() {")
+print("    long total = 0;")
+for i in range(n):
+    print(f"    total += {i} * total + {i};")
+print('    printf("%ld\\n", total);')
+print("    return 0;")
+print("}")
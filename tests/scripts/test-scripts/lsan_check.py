@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+A leak checker for uninstrumented binaries: run the command with the standalone
+LeakSanitizer runtime preloaded, exiting with 111 when it reports a leak.
+"""
+import os
+import sys
+import subprocess
+
+liblsan = subprocess.run(["gcc", "-print-file-name=liblsan.so"],
+                         capture_output=True, text=True).stdout.strip()
+env = dict(os.environ, LD_PRELOAD=liblsan, LSAN_OPTIONS="exitcode=111")
+os.execvpe(sys.argv[1], sys.argv[1:], env)
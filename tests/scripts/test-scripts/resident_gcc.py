@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+#
+# A gcc wrapper which speaks the dragon-runner resident protocol when launched
+# with --resident, and otherwise behaves like a plain gcc invocation. Launching
+# with --crash simulates a resident executable which dies on every job.
+#
+import sys
+import json
+import subprocess
+
+GCC = "/usr/bin/gcc"
+
+def serve(crash: bool):
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    while True:
+        header = stdin.readline()
+        if not header:
+            return 0
+        job = json.loads(header)
+        job_stdin = stdin.read(job["stdin"])
+        if crash:
+            return 1
+        result = subprocess.run([GCC] + job["args"], input=job_stdin,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        reply = {"exit_status": result.returncode,
+                 "stdout": len(result.stdout),
+                 "stderr": len(result.stderr)}
+        stdout.write(json.dumps(reply).encode() + b'\n' + result.stdout + result.stderr)
+        stdout.flush()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("--resident", "--crash"):
+        sys.exit(serve(crash=(sys.argv[1] == "--crash")))
+    sys.exit(subprocess.run([GCC] + sys.argv[1:]).returncode)
@@ -1,9 +1,14 @@
 import os
+import csv
 from dragon_runner.src.harness import TournamentHarness
-from dragon_runner.src.config import Config
+from dragon_runner.src.config import Config, Package
 from dragon_runner.src.cli import RunnerArgs
+from dragon_runner.src.matrix import ResultMatrix
+from dragon_runner.scripts.grade import GradeScript
+from dragon_runner.scripts.grade_perf import GradePerfScript
+from dragon_runner.scripts.perf_baseline import PerfBaselineScript
 
-def test_grader_config(config_factory, cli_factory):
+def test_grader_config(config_factory, cli_factory, tmp_path, monkeypatch):
 
     config : Config = config_factory("ConfigGrade.json")
     args : RunnerArgs = cli_factory(**{
@@ -11,6 +16,8 @@ def test_grader_config(config_factory, cli_factory):
         "failure_log": "Failures.txt",
         "timeout": 2
     })
+    # tournaments write their checkpoint, matrices and timing tables to the cwd
+    monkeypatch.chdir(tmp_path)
     
     harness = TournamentHarness(config=config, cli_args=args) 
     assert harness is not None
@@ -18,3 +25,255 @@ def test_grader_config(config_factory, cli_factory):
     harness.run()
     assert os.path.exists(args.failure_log)
 
+
+def test_validated_tournament(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("gccMixConfig.json")
+    config.solution_exe = "gcc"
+    args : RunnerArgs = cli_factory(**{
+        "mode": "tournament",
+        "timeout": 2
+    })
+    args = args._replace(validate=True, jobs=4)
+    monkeypatch.chdir(tmp_path)
+    
+    harness = TournamentHarness(config=config, cli_args=args)
+    harness.run()
+
+    with open("rejected_tests.txt") as f:
+        rejected = f.read().splitlines()
+    n_tests = sum(len(spkg.tests) for pkg in config.packages for spkg in pkg.subpackages)
+    assert 0 < len(rejected) < n_tests
+    
+    # only accepted tests are counted and the solution passes all of them
+    with open("toolchain_GCC-toolchain.csv") as f:
+        cell = f.read().splitlines()[1].split(',')[1]
+    n_accepted = n_tests - len(rejected)
+    assert cell == f"{n_accepted}/{n_accepted}"
+
+def test_resume_tournament(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("gccMixConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "tournament",
+        "timeout": 2
+    })
+    monkeypatch.chdir(tmp_path)
+    csv_file = "toolchain_GCC-toolchain.csv"
+
+    # interrupt the tournament after the third test
+    harness = TournamentHarness(config=config, cli_args=args)
+    run_test, runs = harness.run_test, []
+    def interrupting_run_test(*a):
+        runs.append(a)
+        if len(runs) == 3:
+            harness.interrupted = True
+        return run_test(*a)
+    harness.run_test = interrupting_run_test
+    harness.run()
+    with open(args.checkpoint_file) as f:
+        assert len(f.read().splitlines()) == 2
+
+    # resuming only runs the tests without a recorded verdict
+    harness = TournamentHarness(config=config, cli_args=args._replace(resume=True))
+    run_test, runs = harness.run_test, []
+    harness.run_test = lambda *a: runs.append(a) or run_test(*a)
+    harness.run()
+    n_tests = sum(len(spkg.tests) for pkg in config.packages for spkg in pkg.subpackages)
+    assert len(runs) == n_tests - 2
+    with open(csv_file) as f:
+        resumed = f.read()
+
+    harness = TournamentHarness(config=config, cli_args=args)
+    harness.run()
+    with open(csv_file) as f:
+        assert f.read() == resumed
+
+def test_recompute_tournament(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("gccMixConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "tournament",
+        "timeout": 2
+    })
+    monkeypatch.chdir(tmp_path)
+    TournamentHarness(config=config, cli_args=args).run()
+    with open(args.checkpoint_file) as f:
+        records = f.read().splitlines()
+
+    def count_runs(cli_args: RunnerArgs) -> int:
+        harness = TournamentHarness(config=config, cli_args=cli_args)
+        run_test, runs = harness.run_test, []
+        harness.run_test = lambda *a: runs.append(a) or run_test(*a)
+        harness.run()
+        return len(runs)
+
+    # a verdict recorded against a different defender binary is recomputed
+    with open(args.checkpoint_file, 'w') as f:
+        f.write('\n'.join([records[0].replace('"defender_hash": "', '"defender_hash": "old')] + records[1:]) + '\n')
+    assert count_runs(args._replace(resume=True)) == 1
+    assert count_runs(args._replace(resume=True)) == 0
+
+    # recomputing a team reruns its whole row and column
+    assert count_runs(args._replace(recompute=["gcc"])) == len(records)
+
+def test_result_matrix(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("gccMixConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "tournament",
+        "timeout": 2
+    })
+    monkeypatch.chdir(tmp_path)
+    TournamentHarness(config=config, cli_args=args).run()
+
+    # the matrix reproduces the CSV table
+    matrix = ResultMatrix.load("toolchain_GCC-toolchain.npz")
+    n_tests = sum(len(spkg.tests) for pkg in config.packages for spkg in pkg.subpackages)
+    assert matrix.passed.shape == (1, n_tests) and matrix.ran.all()
+    table = GradeScript.load_csv("toolchain_GCC-toolchain.csv")
+    assert matrix.to_table() == table
+
+    # grading either format gives the same result
+    for src in ["csv", "npz"]:
+        assert GradeScript.main([f"toolchain_GCC-toolchain.{src}", f"grade_{src}.csv",
+                                 "--solution-name", "mixed", "--defensive-pts", "3",
+                                 "--test-strength", f"strength_{src}.csv"]) == 0
+    with open("grade_csv.csv") as f1, open("grade_npz.csv") as f2:
+        assert f1.read() == f2.read()
+    with open("strength_npz.csv") as f:
+        assert len(f.read().splitlines()) == n_tests + 1
+
+def test_sampled_tournament(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("gccMixConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "tournament",
+        "timeout": 2
+    })
+    args = args._replace(sample=True, min_samples=3, ci_width=1.0, seed=415)
+    monkeypatch.chdir(tmp_path)
+
+    # a wide enough interval stops the cell after the minimum number of samples
+    harness = TournamentHarness(config=config, cli_args=args)
+    run_test, runs = harness.run_test, []
+    harness.run_test = lambda *a: runs.append(a) or run_test(*a)
+    harness.run()
+    assert len(runs) == 3
+    with open("toolchain_GCC-toolchain.csv") as f:
+        cell = f.read().splitlines()[1].split(',', 1)[1].strip('"')
+    rate, interval = cell.split(' ', 1)
+    low, high = (float(x) for x in interval.strip('[]').split(', '))
+    assert low <= float(rate) <= high
+    assert GradeScript.parse_fraction(cell) == float(rate)
+
+    # every prefix of a cell's tests draws from the subpackages in proportion to their sizes
+    for spkg, n in (("big", 9), ("small", 3)):
+        os.makedirs(tmp_path / "pkg" / spkg)
+        for i in range(n):
+            with open(tmp_path / "pkg" / spkg / f"{i}.c", "w") as f:
+                f.write("// CHECK:\n")
+    tests = harness.cell_tests(config.toolchains[0], config.executables[0], Package(str(tmp_path / "pkg")), None)
+    for n in range(1, len(tests) + 1):
+        big = sum(spkg.name == "big" for spkg, _ in tests[:n])
+        assert abs(big - n * 9 / 12) <= 1
+
+    # an interval that is never narrow enough runs every test
+    harness = TournamentHarness(config=config, cli_args=args._replace(ci_width=0.0))
+    harness.run()
+    n_tests = sum(len(spkg.tests) for pkg in config.packages for spkg in pkg.subpackages)
+    with open("toolchain_GCC-toolchain.csv") as f:
+        assert f.read().splitlines()[1].split(',')[1].endswith(f"/{n_tests}")
+
+def test_timing_table(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("gccMixConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "tournament",
+        "timeout": 2
+    })
+    monkeypatch.chdir(tmp_path)
+    TournamentHarness(config=config, cli_args=args).run()
+
+    # the timing table has the same layout as the pass-rate table
+    table = GradeScript.load_csv("toolchain_GCC-toolchain.csv")
+    timing = GradeScript.load_csv("timing_GCC-toolchain.csv")
+    assert [row[0] for row in timing] == [row[0] for row in table]
+    assert timing[0] == table[0]
+    total, median = timing[1][1].split()
+    assert float(total) >= float(median.strip("()")) > 0
+
+def test_grade_perf_schemes(tmp_path):
+
+    # t1: everyone passes, t2: team c times out, t3: team b fails
+    with open(tmp_path / "perf_long.csv", 'w') as f:
+        f.write("executable,toolchain,test,step,status,median\n"
+                "a,tc,t1,score,pass,1.0\nb,tc,t1,score,pass,2.0\nc,tc,t1,score,pass,4.0\n"
+                "a,tc,t2,score,pass,2.0\nb,tc,t2,score,pass,1.0\nc,tc,t2,score,timeout,0.0\n"
+                "a,tc,t2,run,pass,0.5\n"
+                "a,tc,t3,score,pass,1.0\nb,tc,t3,score,fail,0.0\nc,tc,t3,score,pass,1.0\n")
+    exes, times, status = GradePerfScript.load(tmp_path / "perf_long.csv")
+    assert exes == ["a", "b", "c"] and times.shape == (3, 3)
+
+    score = lambda scheme, **kw: list(GradePerfScript.score(times, status, scheme, **kw).round(4))
+    assert score("fastest") == [round((1 + 0.5 + 1) / 3, 4), 0.5, round((0.25 + 1) / 3, 4)]
+    assert score("fastest", timeout_penalty=0.3)[2] == round((0.25 + 0.3 + 1) / 3, 4)
+    # the failure's penalty of 0 is floored instead of zeroing the geometric mean
+    assert score("geomean")[2] == round((0.25 * 0.01 * 1) ** (1 / 3), 4)
+    assert score("geomean", timeout_penalty=0.3)[2] == round((0.25 * 0.3 * 1) ** (1 / 3), 4)
+    assert score("solution", solution=0) == [1.0, round((0.5 + 2) / 3, 4), round((0.25 + 1) / 3, 4)]
+    assert score("rank") == [round((1 + 0.5 + 0.75) / 3, 4), round((0.5 + 1) / 3, 4), round(0.75 / 3, 4)]
+
+    # the wide perf.csv is graded as before, with every cell a pass
+    with open(tmp_path / "perf.csv", 'w') as f:
+        f.write("Test,a,b\nt1,1.0,2.0\nt2,2.0,1.0\n")
+    assert GradePerfScript.main([str(tmp_path / "perf.csv"), str(tmp_path / "out.csv")]) == 0
+    with open(tmp_path / "out.csv") as f:
+        assert f.read().splitlines()[1] == "0.75,0.75"
+
+def test_grade_perf_calibrated(tmp_path):
+
+    # node2 is twice as slow as node1, so b is as fast as a once both are normalized
+    for node, calibration, rows in [("node1", 1.0, "a,tc,t1,score,pass,1.0\n"),
+                                    ("node2", 2.0, "b,tc,t1,score,pass,2.0\nb,tc,t2,score,pass,4.0\n")]:
+        with open(tmp_path / f"{node}.csv", 'w') as f:
+            f.write("executable,toolchain,test,step,status,median,node,calibration\n" +
+                    rows.replace("\n", f",{node},{calibration}\n"))
+    paths = [tmp_path / "node1.csv", tmp_path / "node2.csv"]
+    exes, times, status = GradePerfScript.load(paths)
+    assert exes == ["a", "b"]
+    assert list(times[0]) == [1.5, 1.5] and times[1, 1] == 3.0 and status[1, 0] == "fail"
+    # memory footprints do not depend on the machine's speed
+    assert list(GradePerfScript.load_calibrated(paths, normalize=False)[1][0]) == [1.0, 2.0]
+
+    assert GradePerfScript.main([*map(str, paths), str(tmp_path / "out.csv")]) == 0
+    with open(tmp_path / "out.csv") as f:
+        assert f.read().splitlines()[1] == "0.5,1.0"
+
+def test_perf_baseline(tmp_path):
+
+    def write_long(path, samples):
+        with open(path, 'w') as f:
+            f.write("executable,toolchain,test,step,status,samples\n")
+            for test, (status, times) in samples.items():
+                f.write(f"a,tc,{test},score,{status},{' '.join(map(str, times))}\n")
+
+    base, new, store = tmp_path / "base.csv", tmp_path / "new.csv", str(tmp_path / "baseline.json")
+    write_long(base, {"same": ("pass", [1.0, 1.1, 0.9, 1.0, 1.05]),
+                      "slower": ("pass", [1.0, 1.1, 0.9, 1.0, 1.05]),
+                      "faster": ("pass", [2.0, 2.1, 1.9, 2.0, 2.05]),
+                      "broken": ("pass", [1.0])})
+    write_long(new, {"same": ("pass", [1.02, 0.95, 1.08, 1.0, 1.01]),
+                     "slower": ("pass", [1.5, 1.6, 1.4, 1.5, 1.55]),
+                     "faster": ("pass", [1.0, 1.1, 0.9, 1.0, 1.05]),
+                     "broken": ("timeout", [])})
+    assert PerfBaselineScript.main(["save", str(base), store]) == 0
+    assert PerfBaselineScript.main(["compare", str(base), store]) == 0
+    assert PerfBaselineScript.main(["compare", str(new), store, "-o", str(tmp_path / "cmp.csv")]) == 1
+
+    with open(tmp_path / "cmp.csv") as f:
+        verdicts = {row["test"]: row for row in csv.DictReader(f)}
+    assert verdicts["same"]["verdict"] == "same"
+    assert verdicts["slower"]["verdict"] == "regression" and float(verdicts["slower"]["effect"]) == 1.0
+    assert verdicts["faster"]["verdict"] == "improvement"
+    assert verdicts["broken"]["verdict"] == "regression (timeout)"
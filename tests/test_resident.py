@@ -0,0 +1,33 @@
+from dragon_runner.src.harness import RegularHarness
+from dragon_runner.src.runner import ToolChainRunner
+from dragon_runner.src.config import Config
+from dragon_runner.src.cli import RunnerArgs
+
+def test_resident_pass(config_factory, cli_factory):
+
+    config : Config = config_factory("residentConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "regular",
+        "timeout": 10
+    })
+    
+    harness = RegularHarness(config=config, cli_args=args) 
+    success = harness.run()
+    assert success == True
+
+def test_resident_crash_fallback(config_factory):
+
+    config : Config = config_factory("residentConfig.json")
+    tc = config.toolchains[0]
+    tc[0].resident_args = ["--crash"]
+    exe = config.executables[0]
+    
+    tc_runner = ToolChainRunner(tc, timeout=10)
+    for pkg in config.packages:
+        for spkg in pkg.subpackages:
+            for test in spkg.tests:
+                assert tc_runner.run(test, exe).did_pass
+    
+    # each crash restarts the resident process until it falls back for good
+    assert all(not r.available for r in tc_runner.residents.values())
+    tc_runner.close()
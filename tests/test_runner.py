@@ -1,6 +1,22 @@
-from dragon_runner.src.harness import RegularHarness
-from dragon_runner.src.config import Config
+import os
+import sys
+import time
+import subprocess
+import csv
+import json
+import pytest
+from dragon_runner.src.harness import RegularHarness, CombinedHarness, MemoryCheckHarness, PerformanceTestingHarness, ScalingHarness, TestHarness
+from dragon_runner.src.runner import ToolChainRunner, parse_sanitizer_leaks, run_with_rusage
+from dragon_runner.src.toolchain import Step
+from dragon_runner.src.config import Config, load_config
 from dragon_runner.src.cli import RunnerArgs
+from dragon_runner.src.staging import StagingArea
+from dragon_runner.src.history import TestHistory
+from dragon_runner.src.cache import LeakCache
+from dragon_runner.src.pool import WorkerPool
+from dragon_runner.src.affinity import CpuAllocator, affinity_supported, format_cpu_list, parse_cpu_list
+from dragon_runner.src.stats import crossover, power_fit
+from dragon_runner.scripts.grade_perf import GradePerfScript
 
 def test_gcc_pass(config_factory, cli_factory):
 
@@ -41,3 +57,441 @@ def test_gcc_fail(config_factory, cli_factory):
     success = harness.run()
     assert success == False
 
+
+def test_gcc_pass_staged(config_factory, cli_factory, tmp_path):
+
+    config : Config = config_factory("gccPassConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "regular",
+        "timeout": 10
+    })
+
+    staging = StagingArea(str(tmp_path))
+    staging.stage_config(config)
+    for pkg in config.packages:
+        for spkg in pkg.subpackages:
+            for test in spkg.tests:
+                assert test.path.startswith(staging.root)
+    # system toolchains are resolved relative to their install prefix
+    assert config.executables[0].exe_path == "/usr/bin/gcc"
+
+    harness = RegularHarness(config=config, cli_args=args) 
+    success = harness.run()
+    staging.cleanup()
+    assert success == True
+    assert not os.path.exists(staging.root)
+
+def test_gcc_pass_incremental(config_factory, cli_factory, tmp_path):
+
+    config : Config = config_factory("gccPassConfig.json")
+    args : RunnerArgs = cli_factory(**{
+        "mode": "regular",
+        "timeout": 10
+    })
+    args = args._replace(incremental=True, cache_file=str(tmp_path / "cache.json"))
+
+    harness = RegularHarness(config=config, cli_args=args)
+    assert harness.run() == True
+    assert os.path.exists(args.cache_file)
+
+    # a fresh harness answers every test from the cache
+    harness = RegularHarness(config=config, cli_args=args)
+    tc_runner = ToolChainRunner(config.toolchains[0], args.timeout)
+    for pkg in config.packages:
+        for spkg in pkg.subpackages:
+            for test in spkg.tests:
+                result = harness.run_test(tc_runner, test, config.executables[0])
+                assert result.cached and result.did_pass
+
+def test_history_ordering(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("gccPassConfig.json")
+    exe, tc = config.executables[0], config.toolchains[0]
+    tests = [t for pkg in config.packages for spkg in pkg.subpackages for t in spkg.tests]
+    slow, failed, unseen = tests[0], tests[1], tests[2]
+
+    history = TestHistory(str(tmp_path / "history.json"))
+    for test in tests[:2] + tests[3:]:
+        history.entries[history.key(exe, tc, test)] = {"time": 0.1, "passed": True}
+    history.entries[history.key(exe, tc, slow)]["time"] = 5.0
+    history.entries[history.key(exe, tc, failed)]["passed"] = False
+
+    ordered = history.order(tests, exe, tc, failed_first=True)
+    assert ordered[:2] == [failed, unseen]
+
+    ordered = history.order(tests, exe, tc, longest_first=True)
+    assert ordered[:2] == [unseen, slow]
+
+    assert history.order(tests, exe, tc) == tests
+
+    # history is only kept when ordering is requested or a history file is given
+    args : RunnerArgs = cli_factory(**{"mode": "regular"})
+    assert RegularHarness(config=config, cli_args=args).history is None
+    assert RegularHarness(config=config, cli_args=args._replace(failed_first=True)).history is not None
+    harness = RegularHarness(config=config, cli_args=args._replace(history_file=history.path))
+    assert harness.history.path == history.path
+
+    # parallel runs hand the slowest tests to the pool first
+    history.save()
+    submitted = []
+    monkeypatch.setattr(WorkerPool, "map", lambda self, fn, tests: submitted.append(list(tests)) or iter([]))
+    args = args._replace(jobs=2, longest_first=True, history_file=history.path)
+    config.executables = [exe]
+    for harness in (MemoryCheckHarness(config=config, cli_args=args._replace(mode="memcheck")),
+                    PerformanceTestingHarness(config=config, cli_args=args._replace(mode="perf"))):
+        monkeypatch.chdir(tmp_path)
+        harness.run()
+    assert [tests[:2] for tests in submitted] == [[unseen, slow]] * 2
+
+def test_missing_executable_breaker(config_factory, cli_factory):
+
+    config : Config = config_factory("gccPassConfig.json")
+    exe, tc = config.executables[0], config.toolchains[0]
+    exe.exe_path = "/nonexistent/gcc"
+    tests = [t for pkg in config.packages for spkg in pkg.subpackages for t in spkg.tests]
+    args : RunnerArgs = cli_factory(**{"mode": "regular", "timeout": 5})
+
+    # without the probe the breaker trips after two identical startup failures
+    harness = RegularHarness(config=config, cli_args=args._replace(probe=False, breaker=2))
+    tc_runner = ToolChainRunner(tc, args.timeout)
+    results = [harness.run_test(tc_runner, test, exe) for test in tests]
+    assert not any(r.did_pass for r in results)
+    assert [r.skip_reason is None for r in results[:3]] == [True, True, False]
+    assert "circuit breaker" in results[2].skip_reason
+
+    # the smoke probe fails every test up front
+    harness = RegularHarness(config=config, cli_args=args)
+    result = harness.run_test(tc_runner, tests[0], exe)
+    assert "smoke probe" in result.skip_reason
+    assert result.command_history == []
+
+def test_identical_executables_run_once(config_factory, cli_factory):
+
+    config : Config = config_factory("perfConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "regular", "timeout": 10})
+    harness = RegularHarness(config=config, cli_args=args)
+    test = config.packages[0].subpackages[0].tests[0]
+
+    runs = []
+    tc_runner = ToolChainRunner(config.toolchains[0], args.timeout)
+    run = tc_runner.run
+    tc_runner.run = lambda *a: runs.append(a) or run(*a)
+
+    # gcc1, gcc2 and gcc3 are all /usr/bin/gcc
+    results = [harness.run_test(tc_runner, test, exe) for exe in config.executables]
+    assert len(runs) == 1
+    assert all(r.did_pass == results[0].did_pass for r in results)
+
+def test_timeout_with_background_grandchild():
+
+    # a descendant holding the output pipes open must not outlive the timeout
+    for script in ("sleep 20 & sleep 20", "sleep 20 & echo hi"):
+        start = time.monotonic()
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_with_rusage(["sh", "-c", script], b'', 1.0)
+        assert time.monotonic() - start < 5
+
+    result = run_with_rusage(["sh", "-c", "cat; echo err >&2; exit 3"], b'x' * 200000, 5.0)
+    assert (len(result.stdout), result.stderr, result.returncode) == (200000, b'err\n', 3)
+    assert result.rusage.ru_maxrss > 0
+
+def test_perf_trials(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("perfConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "perf", "timeout": 10})
+    args = args._replace(warmup=1, trials=3)
+    monkeypatch.chdir(tmp_path)
+    harness = PerformanceTestingHarness(config=config, cli_args=args)
+    runs = []
+    run_test = TestHarness.run_test
+    monkeypatch.setattr(TestHarness, "run_test", lambda *a: runs.append(a) or run_test(*a))
+    harness.run()
+
+    n_tests = sum(len(spkg.tests) for pkg in config.packages for spkg in pkg.subpackages)
+    n_cells = n_tests * len(config.executables)
+    assert len(runs) == n_cells * (1 + 3)
+
+    with open("perf.csv") as f:
+        wide = list(csv.reader(f))
+    assert wide[0] == ["Test"] + [exe.id for exe in config.executables]
+    assert len(wide) == n_tests + 1
+
+    with open("perf_long.csv") as f:
+        long = list(csv.DictReader(f))
+    scores = [row for row in long if row["step"] == "score"]
+    assert len(scores) == n_cells
+    assert [row["step"] for row in long[:3]] == ["score", "compile", "run"]
+    for score, compile, run in zip(long[0::3], long[1::3], long[2::3]):
+        samples = [float(s) for s in score["samples"].split()]
+        assert score["status"] == "pass" and int(score["trials"]) == len(samples) == 3
+        assert float(score["min"]) <= float(score["median"]) <= max(samples)
+        # only the last step is scored by default
+        assert score["samples"] == run["samples"] != compile["samples"]
+        assert float(compile["user"]) > 0
+        assert score["maxrss"] == run["maxrss"] and int(float(run["faults"])) > 0
+
+    # peak RSS is reported in the same shape as perf.csv and can be graded
+    with open("mem.csv") as f:
+        mem = list(csv.reader(f))
+    assert mem[0] == wide[0] and len(mem) == len(wide)
+    assert all(int(kb) > 0 for row in mem[1:] for kb in row[1:])
+    assert GradePerfScript.main(["perf_long.csv", "mem_grades.csv", "--metric", "maxrss"]) == 0
+
+    # steps marked perfScore are scored together
+    for step in config.toolchains[0].steps:
+        step.perf_score = True
+    PerformanceTestingHarness(config=config, cli_args=args._replace(warmup=0, trials=1)).run()
+    with open("perf_long.csv") as f:
+        score, compile, run = list(csv.DictReader(f))[:3]
+    assert float(score["samples"]) == pytest.approx(float(compile["samples"]) + float(run["samples"]), abs=1e-5)
+
+def test_perf_same_named_tests(cli_factory, tmp_path, monkeypatch):
+
+    # one test file name in two subpackages, which pass and fail respectively
+    for spkg, ret in (("first", 0), ("second", 1)):
+        os.makedirs(tmp_path / "pkg" / spkg)
+        with open(tmp_path / "pkg" / spkg / "dup.c", "w") as f:
+            f.write(f"// CHECK:{spkg}\n#include <stdio.h>\n"
+                    f"int main() {{ printf(\"{spkg}\"); return {ret}; }}\n")
+    with open(os.path.join(os.path.dirname(__file__), "configs", "perfConfig.json")) as f:
+        config_json = json.load(f)
+    config_json["testDir"] = str(tmp_path / "pkg")
+    with open(tmp_path / "config.json", "w") as f:
+        json.dump(config_json, f)
+
+    config : Config = load_config(str(tmp_path / "config.json"))
+    args : RunnerArgs = cli_factory(**{"mode": "perf", "timeout": 10})
+    monkeypatch.chdir(tmp_path)
+    PerformanceTestingHarness(config=config, cli_args=args).run()
+
+    with open("perf.csv") as f:
+        wide = list(csv.reader(f))
+    assert [row[0] for row in wide[1:]] == ["dup.c", "dup.c"]
+    assert sorted(row[1] == str(args.timeout) for row in wide[1:]) == [False, True]
+    with open("perf_long.csv") as f:
+        scores = [row for row in csv.DictReader(f) if row["step"] == "score"]
+    assert sorted(row["status"] for row in scores) == ["fail"] * 3 + ["pass"] * 3
+    assert {row["test"] for row in scores} == {"first/dup.c", "second/dup.c"}
+
+    # both tests are graded from the long file
+    exes, times, status = GradePerfScript.load("perf_long.csv")
+    assert times.shape == (2, 3)
+    assert sorted(status[:, 0]) == ["fail", "pass"]
+
+def test_perf_interleaved(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("perfConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "perf", "timeout": 10})
+    args = args._replace(trials=2, interleave=True, seed=7)
+    monkeypatch.chdir(tmp_path)
+
+    runs = []
+    run_test = TestHarness.run_test
+    monkeypatch.setattr(TestHarness, "run_test", lambda self, r, t, exe: runs.append((t.file, exe.id)) or run_test(self, r, t, exe))
+    def run_order():
+        runs.clear()
+        PerformanceTestingHarness(config=config, cli_args=args).run()
+        return list(runs)
+
+    # every test finishes all of its trials on every executable before the next test
+    first = run_order()
+    n_exes = len(config.executables)
+    tests = [test for test, _ in first]
+    assert all(len(set(tests[i:i + 2 * n_exes])) == 1 for i in range(0, len(tests), 2 * n_exes))
+    assert run_order() == first
+
+    with open("perf_long.csv") as f:
+        assert {row["seed"] for row in csv.DictReader(f)} == {"7"}
+
+@pytest.mark.skipif(not affinity_supported(), reason="CPU affinity is not supported on this platform")
+def test_perf_pinned(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    assert parse_cpu_list("0-2,5,7-8") == [0, 1, 2, 5, 7, 8]
+    assert format_cpu_list([8, 0, 1, 2, 5, 7]) == "0-2,5,7-8"
+
+    cpu = min(os.sched_getaffinity(0))
+    with pytest.raises(ValueError):
+        CpuAllocator([cpu, max(os.sched_getaffinity(0)) + 1])
+
+    config : Config = config_factory("perfConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "perf", "timeout": 10})
+    args = args._replace(pin_cpus=str(cpu), harness_cpus=str(cpu), trials_per_set=2, jobs=4)
+    monkeypatch.chdir(tmp_path)
+    # pinning the harness narrows the affinity of the pytest process itself
+    affinity = os.sched_getaffinity(0)
+    try:
+        harness = PerformanceTestingHarness(config=config, cli_args=args)
+        harness.run()
+    finally:
+        os.sched_setaffinity(0, affinity)
+    assert harness.allocator.in_use == [0]
+
+    with open("perf_long.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert rows and all(row["cpus"] == str(cpu) and row["status"] == "pass" for row in rows)
+
+def test_perf_calibrate(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    config : Config = config_factory("perfConfig.json")
+    config.solution_exe = "gcc1"
+    args : RunnerArgs = cli_factory(**{"mode": "perf", "timeout": 10})
+    monkeypatch.chdir(tmp_path)
+    harness = PerformanceTestingHarness(config=config, cli_args=args._replace(calibrate=True))
+    assert harness.run()
+    assert harness.calibration > 0
+
+    with open("perf_long.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert {float(row["calibration"]) for row in rows} == {round(harness.calibration, 6)}
+    assert all(row["node"] for row in rows)
+
+    # every reference test must pass for the calibration to be complete
+    harness = PerformanceTestingHarness(config=config, cli_args=args._replace(
+        calibrate=True, calibration_dir=os.path.join(os.path.dirname(__file__), "packages/FailCPackage")))
+    assert not harness.run()
+    assert harness.calibration is None
+
+    # calibrating needs the solution to time
+    config.solution_exe = None
+    assert not PerformanceTestingHarness(config=config, cli_args=args._replace(calibrate=True)).run()
+
+def test_memcheck_leak_cache(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    assert Step(stepName="valgrind", executablePath="/usr/bin/valgrind").leak_check
+    assert not Step(stepName="run", executablePath="$INPUT").leak_check
+
+    config : Config = config_factory("leakCheckConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "memcheck", "timeout": 10})
+    args = args._replace(jobs=3, dedup=False, leak_cache=str(tmp_path / "leaks.json"))
+    results = []
+    process = MemoryCheckHarness.process_test_result
+    monkeypatch.setattr(MemoryCheckHarness, "process_test_result",
+                        lambda self, tr, ctx: results.append(tr) or process(self, tr, ctx))
+
+    MemoryCheckHarness(config=config, cli_args=args).run()
+    first = {(tr.test.file, tr.did_pass) for tr in results}
+    # both executables build the same artifacts, so only the first one is checked
+    n_tests = len(first)
+    assert not any(tr.cached for tr in results[:n_tests])
+    assert all(tr.cached for tr in results[n_tests:])
+
+    # a later run compiles again but reuses every leak check verdict
+    results.clear()
+    MemoryCheckHarness(config=config, cli_args=args).run()
+    assert all(tr.cached and len(tr.command_history) == 1 for tr in results)
+    assert {(tr.test.file, tr.did_pass) for tr in results} == first
+
+    # a run which raises at the leak check step records no verdict
+    cache = LeakCache(str(tmp_path / "aborted.json"))
+    tc_runner = ToolChainRunner(config.toolchains[0], args.timeout)
+    tc_runner.leak_cache = cache
+    run_command = tc_runner.run_command
+    def abort(command, stdin):
+        if tc_runner.leak_key:
+            raise RuntimeError("aborted")
+        return run_command(command, stdin)
+    tc_runner.run_command = abort
+    with pytest.raises(RuntimeError):
+        tc_runner.run(config.packages[0].subpackages[0].tests[0], config.executables[0])
+    assert cache.entries == {}
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="the leak checker preloads gcc's liblsan")
+def test_combined_leak_check(config_factory, cli_factory, monkeypatch):
+
+    results = []
+    process = CombinedHarness.process_test_result
+    monkeypatch.setattr(CombinedHarness, "process_test_result",
+                        lambda self, tr, ctx: results.append(tr) or process(self, tr, ctx))
+
+    config : Config = config_factory("combinedConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "combined", "timeout": 10})
+    assert CombinedHarness(config=config, cli_args=args).run()
+    assert {tr.test.file for tr in results if tr.memory_leak} == {"019_memleak.c"}
+    assert all(tr.did_pass and tr.leak_status in ("clean", "leak") for tr in results)
+    # the checker preloads LeakSanitizer, whose report is parsed
+    assert [tr.leaked_bytes for tr in results if tr.memory_leak] == [4096 * 4]
+    # the artifact is compiled once and only its run is repeated under the checker
+    assert all(len(tr.command_history) == 2 for tr in results)
+
+    # failing tests are not leak checked
+    results.clear()
+    config = config_factory("gccFailConfig.json")
+    config.leak_checker = config_factory("combinedConfig.json").leak_checker
+    assert not CombinedHarness(config=config, cli_args=args).run()
+    assert results and all(tr.leak_status is None for tr in results if not tr.did_pass)
+
+    # neither are error tests, which pass on the step that failed
+    results.clear()
+    config = config_factory("gccPassConfig.json")
+    config.leak_checker = config_factory("combinedConfig.json").leak_checker
+    assert CombinedHarness(config=config, cli_args=args).run()
+    error_tests = [tr for tr in results if tr.error_test]
+    assert error_tests and all(tr.did_pass and tr.leak_status is None for tr in error_tests)
+    assert all(tr.leak_status in ("clean", "leak") for tr in results if not tr.error_test)
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="LeakSanitizer is off by default on macOS")
+def test_memcheck_sanitizer(config_factory, cli_factory, monkeypatch):
+
+    report = (b"==1==ERROR: LeakSanitizer: detected memory leaks\n"
+              b"SUMMARY: AddressSanitizer: 40 byte(s) leaked in 2 allocation(s).\n"
+              b"SUMMARY: LeakSanitizer: 8 byte(s) leaked in 1 allocation(s).\n")
+    assert parse_sanitizer_leaks(report) == (48, 3)
+    assert parse_sanitizer_leaks(b"") is None
+
+    results = []
+    process = MemoryCheckHarness.process_test_result
+    monkeypatch.setattr(MemoryCheckHarness, "process_test_result",
+                        lambda self, tr, ctx: results.append(tr) or process(self, tr, ctx))
+
+    # the leaking binary exits nonzero, but only because it leaked
+    config : Config = config_factory("sanitizerConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "memcheck", "timeout": 10})
+    MemoryCheckHarness(config=config, cli_args=args).run()
+    assert results and all(tr.did_pass for tr in results)
+    leaks = [tr for tr in results if tr.memory_leak]
+    assert [(tr.test.file, tr.leaked_bytes, tr.leak_allocations) for tr in leaks] == [("019_memleak.c", 4096 * 4, 1)]
+
+@pytest.mark.skipif(not affinity_supported(), reason="CPU affinity is not supported on this platform")
+def test_perf_disjoint_cpus(config_factory, cli_factory, monkeypatch):
+
+    # an 8 CPU machine, where pinning the harness narrows the process affinity
+    mask = set(range(8))
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(mask))
+    monkeypatch.setattr(os, "sched_setaffinity", lambda pid, cpus: mask.intersection_update(cpus))
+
+    config : Config = config_factory("perfConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "perf", "timeout": 10})
+    args = args._replace(harness_cpus="0-1", pin_cpus="2-7", cpus_per_trial=2)
+    harness = PerformanceTestingHarness(config=config, cli_args=args)
+    assert mask == {0, 1}
+    assert harness.allocator.sets == [frozenset({2, 3}), frozenset({4, 5}), frozenset({6, 7})]
+
+def test_scaling(config_factory, cli_factory, tmp_path, monkeypatch):
+
+    coefficient, exponent, r2 = power_fit([10, 20, 40, 80], [3 * n ** 2 for n in (10, 20, 40, 80)])
+    assert coefficient == pytest.approx(3) and exponent == pytest.approx(2) and r2 == pytest.approx(1)
+    # 3n^2 and 300n take equal time at n = 100
+    assert crossover((coefficient, exponent, r2), (300, 1, 1)) == pytest.approx(100)
+    assert power_fit([10], [1.0]) is None
+
+    config : Config = config_factory("scalingConfig.json")
+    args : RunnerArgs = cli_factory(**{"mode": "scaling", "timeout": 10})
+    monkeypatch.chdir(tmp_path)
+    harness = ScalingHarness(config=config, cli_args=args)
+    assert harness.run()
+
+    with open("perf_long.csv") as f:
+        tests = {row["test"] for row in csv.DictReader(f) if row["status"] == "pass"}
+    # generated sources are named as if they sat next to their test
+    assert tests == {f"scaling/loop@{n}.c" for n in (1000000, 4000000, 16000000)} | \
+                    {f"scaling/unrolled@{n}.c" for n in (250, 500, 1000)}
+
+    with open("scaling.csv") as f:
+        rows = list(csv.DictReader(f))
+    # a curve for the score and each step of every executable on both tests
+    assert len(rows) == 2 * 3 * len(config.executables)
+    for row in rows:
+        assert len(row["sizes"].split()) == 3 and row["exponent"]
+        assert bool(row["crossover"]) == (row["executable"] != "gcc1")
+    compile_fit = next(row for row in rows if row["test"] == "scaling/unrolled.c" and row["step"] == "compile")
+    assert float(compile_fit["exponent"]) > 0